@@ -35,7 +35,7 @@ const ChatModule = {
         body: JSON.stringify({
           message,
           collection: this.collection.map(a => ({ artist: a.artist, album: a.album })),
-          history: this.chatHistory.slice(-10),
+          history: this.chatHistory.slice(-6),
           category_slug: this.currentCategorySlug || 'vinyl'
         })
       });
@@ -22,71 +22,58 @@ const ProfileChat = {
 
     Profile.chatHistory.push({ role: 'user', content: message });
 
+    // Assistant bubble, created on the first visible streamed token
+    let messageEl = null;
+
     try {
-      const response = await Auth.apiRequest('/api/chat/', {
+      const response = await Auth.apiRequest('/api/chat/stream', {
         method: 'POST',
         body: JSON.stringify({
           message,
           collection: Profile.collection.map(a => ({ artist: a.artist, album: a.album })),
-          history: Profile.chatHistory.slice(-10),
+          history: Profile.chatHistory.slice(-6),
           category_slug: Profile.currentCategorySlug || 'vinyl'
         })
       });
 
-      this.hideTypingIndicator();
-
       if (response.ok) {
-        const data = await response.json();
+        const data = await this.readChatStream(response, (raw) => {
+          const preview = this.streamPreview(raw);
+          if (!preview) return;
+          if (!messageEl) {
+            this.hideTypingIndicator();
+            messageEl = this.addChatMessage(preview, 'assistant');
+          } else {
+            messageEl.textContent = preview;
+            const container = document.getElementById('ai-chat-container');
+            container.scrollTop = container.scrollHeight;
+          }
+        });
+
+        this.hideTypingIndicator();
 
+        // The final response is cleaned server-side - replace the streamed preview
         const cleanResponse = typeof DOMPurify !== 'undefined'
           ? DOMPurify.sanitize(data.response)
           : data.response;
-        this.addChatMessage(cleanResponse, 'assistant');
-
-        Profile.chatHistory.push({ role: 'assistant', content: data.response });
-
-        const actions = [];
-
-        if (data.albums_to_add?.length > 0) {
-          console.log('[Chat] Albums to add:', data.albums_to_add);
-          for (const album of data.albums_to_add) {
-            const success = await this.addAlbumFromChat(album);
-            if (success) {
-              actions.push(`Added: ${album.artist} - ${album.album}`);
-            }
-          }
+        if (messageEl) {
+          messageEl.textContent = cleanResponse;
+        } else {
+          this.addChatMessage(cleanResponse, 'assistant');
         }
 
-        if (data.albums_to_remove?.length > 0) {
-          console.log('[Chat] Albums to remove:', data.albums_to_remove);
-          for (const album of data.albums_to_remove) {
-            const success = await this.removeAlbumFromChat(album);
-            if (success) {
-              actions.push(`Removed: ${album.artist} - ${album.album}`);
-            }
-          }
-        }
-
-        if (data.albums_to_showcase?.length > 0) {
-          console.log('[Chat] Albums to showcase:', data.albums_to_showcase);
-          for (const album of data.albums_to_showcase) {
-            const success = await this.showcaseAlbumFromChat(album);
-            if (success) {
-              actions.push(`Showcased: ${album.artist} - ${album.album}`);
-            }
-          }
-        }
+        Profile.chatHistory.push({ role: 'assistant', content: data.response });
 
-        if (actions.length > 0) {
-          this.showActionFeedback(actions);
-        }
+        await this.applyChatActions(data);
       } else {
+        this.hideTypingIndicator();
         const errorData = await response.json().catch(() => ({}));
         this.addChatMessage(errorData.detail || 'Sorry, I had trouble processing that. Please try again.', 'assistant');
       }
     } catch (error) {
       console.error('Chat error:', error);
       this.hideTypingIndicator();
+      if (messageEl) messageEl.remove();
       this.addChatMessage('Sorry, something went wrong. Please try again.', 'assistant');
     } finally {
       input.disabled = false;
@@ -95,6 +82,131 @@ const ProfileChat = {
     }
   },
 
+  /**
+   * Read the /api/chat/stream Server-Sent Events response.
+   * Calls onToken with the raw text so far for each `token` event and
+   * resolves with the ChatResponse from the final `done` event.
+   */
+  async readChatStream(response, onToken) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let raw = '';
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = 'message';
+        let payload = '';
+        for (const line of frame.split('\n')) {
+          if (line.startsWith('event: ')) event = line.slice(7);
+          else if (line.startsWith('data: ')) payload += line.slice(6);
+        }
+        if (!payload) continue;
+
+        const data = JSON.parse(payload);
+        if (event === 'token') {
+          raw += data;
+          onToken(raw);
+        } else if (event === 'done') {
+          return data;
+        } else if (event === 'error') {
+          throw new Error(data.detail);
+        }
+      }
+    }
+
+    throw new Error('Sorry, I had trouble processing that. Please try again.');
+  },
+
+  // Mirrors POLLUTED_START_PATTERN / REASONING_START_PATTERN in worker/src/routes/chat.py
+  POLLUTED_START: new RegExp('^\\.?\\s*(?:' + [
+    'According to the rules', 'The user asks', 'The user wants', 'The user is asking',
+    'We have a user', 'We need to check', 'We should check', 'We must follow',
+    'Should be no action', 'No action tags', "Let's think", "Let's analyze",
+    'First,\\s+I need', 'So,?\\s+we need', 'So,?\\s+the user', 'The collection contains',
+    'I need to analyze', 'I should check', 'Looking at the rules', 'Based on the rules',
+    'Since the user', 'Given that the'
+  ].join('|') + ')', 'i'),
+  REASONING_START: new RegExp([
+    'According to the rules', 'The user asks for', 'The user wants me to', 'The user is asking',
+    'We need to check', 'We should check', 'We must follow', 'Should be no action',
+    'No action tags needed', "Let's think about", 'Let me think about', 'The collection contains'
+  ].map(p => '[.\\s]+' + p).join('|'), 'i'),
+  // Long enough to tell whether the reply opens with one of the reasoning phrases
+  PREVIEW_MIN_LENGTH: 24,
+
+  /**
+   * Displayable part of a partially streamed response.
+   * Hides thinking blocks and action tags, including ones still being generated,
+   * and chain-of-thought the server would strip from the final response.
+   */
+  streamPreview(raw) {
+    let preview = raw
+      .replace(/<(think(?:ing)?)>[\s\S]*?(<\/\1>|$)/gi, '')
+      .replace(/\{\{?[^}]*(\}\}?|$)/g, '')
+      .replace(/<[^>]*$/, '')
+      .trim();
+
+    // Hold back until the opening can be classified, and for the whole reply
+    // if it opens with reasoning - the final `done` response replaces it
+    if (preview.length < this.PREVIEW_MIN_LENGTH || this.POLLUTED_START.test(preview)) {
+      return '';
+    }
+
+    const reasoning = preview.search(this.REASONING_START);
+    if (reasoning !== -1) preview = preview.slice(0, reasoning).trim();
+    return preview;
+  },
+
+  /**
+   * Apply the add/remove/showcase actions from a chat response
+   */
+  async applyChatActions(data) {
+    const actions = [];
+
+    if (data.albums_to_add?.length > 0) {
+      console.log('[Chat] Albums to add:', data.albums_to_add);
+      for (const album of data.albums_to_add) {
+        const success = await this.addAlbumFromChat(album);
+        if (success) {
+          actions.push(`Added: ${album.artist} - ${album.album}`);
+        }
+      }
+    }
+
+    if (data.albums_to_remove?.length > 0) {
+      console.log('[Chat] Albums to remove:', data.albums_to_remove);
+      for (const album of data.albums_to_remove) {
+        const success = await this.removeAlbumFromChat(album);
+        if (success) {
+          actions.push(`Removed: ${album.artist} - ${album.album}`);
+        }
+      }
+    }
+
+    if (data.albums_to_showcase?.length > 0) {
+      console.log('[Chat] Albums to showcase:', data.albums_to_showcase);
+      for (const album of data.albums_to_showcase) {
+        const success = await this.showcaseAlbumFromChat(album);
+        if (success) {
+          actions.push(`Showcased: ${album.artist} - ${album.album}`);
+        }
+      }
+    }
+
+    if (actions.length > 0) {
+      this.showActionFeedback(actions);
+    }
+  },
+
   /**
    * Show typing indicator in chat
    */
@@ -152,6 +264,7 @@ const ProfileChat = {
     message.textContent = content;
     container.appendChild(message);
     container.scrollTop = container.scrollHeight;
+    return message;
   },
 
   /**
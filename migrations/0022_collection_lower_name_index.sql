@@ -0,0 +1,9 @@
+-- Case-insensitive duplicate lookups
+-- Migration 0022
+
+-- add_album and sync match items with
+--   user_id = ? AND LOWER(artist) = LOWER(?) AND LOWER(album) = LOWER(?)
+-- which can't use idx_collections_user/idx_collections_artist beyond user_id.
+-- An expression index on the same LOWER() terms makes the check a direct lookup.
+CREATE INDEX IF NOT EXISTS idx_collections_user_lower_name
+    ON collections(user_id, LOWER(artist), LOWER(album));
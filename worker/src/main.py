@@ -174,4 +174,5 @@ class Default(WorkerEntrypoint):
 
     async def fetch(self, request):
         """Handle incoming HTTP requests"""
-        return await asgi.fetch(app, request, self.env)
+        # Pass ctx so background tasks (run after the response) are kept alive via waitUntil
+        return await asgi.fetch(app, request, self.env, self.ctx)
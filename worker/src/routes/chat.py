@@ -4,17 +4,26 @@ Uses ServiceNow-AI/Apriel-1.6-15b-Thinker model
 """
 
 from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from routes.auth import require_auth
 import js
 from pyodide.ffi import to_js
+import asyncio
+import codecs
+import functools
+from collections import OrderedDict
+import hashlib
+import itertools
+import json
 import re
+import time
 
 # Import external API services (SOLID: Single Responsibility)
 from services.discogs import search_discogs_for_album, Album
-from services.pokemon_tcg import search_pokemon_tcg
-from services.scryfall import search_scryfall
+from services.pokemon_tcg import search_pokemon_tcg, search_pokemon_tcg_bulk
+from services.scryfall import search_scryfall, search_scryfall_bulk
 from services.rawg import search_rawg
 
 router = APIRouter()
@@ -22,6 +31,30 @@ router = APIRouter()
 TOGETHER_API_URL = "https://api.together.xyz/v1/chat/completions"
 CHAT_MODEL = "ServiceNow-AI/Apriel-1.6-15b-Thinker"
 
+# Prompt size limits - prefill time (TTFT) grows with prompt length
+CHAT_HISTORY_LIMIT = 6  # most recent history messages sent to the model
+PROMPT_COLLECTION_LIMIT = 50  # collection items listed in the system prompt
+
+# Generation caps - latency is linear in generated tokens. Action turns keep the full
+# budget: the Thinker model's reasoning preamble comes first and the tags come last.
+MAX_TOKENS_DEFAULT = 512  # any add/remove/showcase request
+MAX_TOKENS_CHAT = 400  # conversational turns
+ACTION_INTENT_PATTERN = re.compile(r'\b(add|remove|showcase|put|delete)\b', re.IGNORECASE)
+
+# Categories with an enrichment API in search_for_item (others are returned as-is)
+ENRICHMENT_CATEGORIES = {"vinyl", "trading-cards", "video-games"}
+
+# Max concurrent enrichment lookups per chat turn (keeps us under API rate limits)
+ENRICH_CONCURRENCY = 8
+
+# Sampling params sent to Together.ai
+CHAT_TEMPERATURE = 0.7
+
+# Enrichment results cache: R2 across isolates, in-memory LRU within one
+ENRICH_CACHE_TTL = 86400  # seconds
+ENRICH_MEMO_SIZE = 2048  # Album entries are a few hundred bytes each
+_enrich_memo: OrderedDict[str, Album] = OrderedDict()
+
 # Category-specific AI prompts
 CATEGORY_AI_PROMPTS = {
     "vinyl": """You are a vinyl record collection assistant. Help users manage their record collection and write their bio.
@@ -90,115 +123,111 @@ class ChatResponse(BaseModel):
     albums_to_showcase: list[Album] = []
 
 
-def build_system_prompt(collection: list[Album], category_slug: Optional[str] = None) -> str:
-    """Build system prompt with collection context and optional category customization"""
-
-    collection_list = ""
-    if collection:
-        collection_list = "\n".join([f"- {a.artist} - {a.album}" for a in collection])
-    else:
-        collection_list = "(empty)"
+# Category-specific terminology and examples
+CATEGORY_PROMPT_CONFIG = {
+    "vinyl": {
+        "item_name": "albums",
+        "field1": "Artist",
+        "field2": "Album",
+        "examples": [
+            ('Add Maggot Brain by Funkadelic', 'I\'ve added that classic! {{ADD:Funkadelic|Maggot Brain}}'),
+            ('Remove Dark Side of the Moon', 'Removed from your collection. {{REMOVE:Pink Floyd|Dark Side of the Moon}}'),
+        ],
+        "rec_question": "what genres or artists you're into"
+    },
+    "coins": {
+        "item_name": "coins",
+        "field1": "Country Denomination",
+        "field2": "Year",
+        "examples": [
+            ('Add a 1921 Morgan Dollar', 'Added to your collection! {{ADD:USA Morgan Dollar|1921}}'),
+            ('Remove the Walking Liberty half', 'Removed. {{REMOVE:USA Walking Liberty Half Dollar|1942}}'),
+        ],
+        "rec_question": "what countries, eras, or types of coins interest you"
+    },
+    "trading-cards": {
+        "item_name": "cards",
+        "field1": "Set/Brand",
+        "field2": "Card Name",
+        "examples": [
+            ('Add a Base Set Charizard', 'Added to your collection! {{ADD:Pokemon Base Set|Charizard}}'),
+            ('Remove the Black Lotus', 'Removed from your collection. {{REMOVE:MTG Alpha|Black Lotus}}'),
+        ],
+        "rec_question": "what games or sets you collect"
+    },
+    "cars": {
+        "item_name": "vehicles",
+        "field1": "Make",
+        "field2": "Model/Year",
+        "examples": [
+            ('Add my 1969 Mustang', 'Added to your garage! {{ADD:Ford|1969 Mustang}}'),
+            ('Remove the Supra', 'Removed from your collection. {{REMOVE:Toyota|Supra}}'),
+        ],
+        "rec_question": "what types of cars interest you (JDM, muscle, classics, etc.)"
+    },
+    "sneakers": {
+        "item_name": "pairs",
+        "field1": "Brand",
+        "field2": "Model/Colorway",
+        "examples": [
+            ('Add Jordan 1 Chicago', 'Added to your collection! {{ADD:Nike|Air Jordan 1 Chicago}}'),
+            ('Remove the Yeezys', 'Removed from your collection. {{REMOVE:Adidas|Yeezy 350}}'),
+        ],
+        "rec_question": "what brands or silhouettes you're into"
+    },
+    "watches": {
+        "item_name": "watches",
+        "field1": "Brand",
+        "field2": "Model",
+        "examples": [
+            ('Add my Submariner', 'Added to your collection! {{ADD:Rolex|Submariner}}'),
+            ('Remove the Speedmaster', 'Removed from your collection. {{REMOVE:Omega|Speedmaster}}'),
+        ],
+        "rec_question": "what styles or brands interest you"
+    },
+    "comics": {
+        "item_name": "comics",
+        "field1": "Publisher/Series",
+        "field2": "Issue",
+        "examples": [
+            ('Add Amazing Spider-Man 300', 'Added to your collection! {{ADD:Marvel Amazing Spider-Man|#300}}'),
+            ('Remove Detective Comics 27', 'Removed from your collection. {{REMOVE:DC Detective Comics|#27}}'),
+        ],
+        "rec_question": "what publishers, characters, or eras you collect"
+    },
+    "video-games": {
+        "item_name": "games",
+        "field1": "Platform",
+        "field2": "Title",
+        "examples": [
+            ('Add Zelda Ocarina of Time', 'Added to your collection! {{ADD:N64|The Legend of Zelda: Ocarina of Time}}'),
+            ('Remove Mario Kart', 'Removed from your collection. {{REMOVE:Switch|Mario Kart 8}}'),
+        ],
+        "rec_question": "what platforms or genres you enjoy"
+    },
+}
 
-    # Get category-specific prompt if available
-    category_prompt = CATEGORY_AI_PROMPTS.get(category_slug, CATEGORY_AI_PROMPTS.get("vinyl", ""))
-
-    # Category-specific terminology and examples
-    category_config = {
-        "vinyl": {
-            "item_name": "albums",
-            "field1": "Artist",
-            "field2": "Album",
-            "examples": [
-                ('Add Maggot Brain by Funkadelic', 'I\'ve added that classic! {{ADD:Funkadelic|Maggot Brain}}'),
-                ('Remove Dark Side of the Moon', 'Removed from your collection. {{REMOVE:Pink Floyd|Dark Side of the Moon}}'),
-            ],
-            "rec_question": "what genres or artists you're into"
-        },
-        "coins": {
-            "item_name": "coins",
-            "field1": "Country Denomination",
-            "field2": "Year",
-            "examples": [
-                ('Add a 1921 Morgan Dollar', 'Added to your collection! {{ADD:USA Morgan Dollar|1921}}'),
-                ('Remove the Walking Liberty half', 'Removed. {{REMOVE:USA Walking Liberty Half Dollar|1942}}'),
-            ],
-            "rec_question": "what countries, eras, or types of coins interest you"
-        },
-        "trading-cards": {
-            "item_name": "cards",
-            "field1": "Set/Brand",
-            "field2": "Card Name",
-            "examples": [
-                ('Add a Base Set Charizard', 'Added to your collection! {{ADD:Pokemon Base Set|Charizard}}'),
-                ('Remove the Black Lotus', 'Removed from your collection. {{REMOVE:MTG Alpha|Black Lotus}}'),
-            ],
-            "rec_question": "what games or sets you collect"
-        },
-        "cars": {
-            "item_name": "vehicles",
-            "field1": "Make",
-            "field2": "Model/Year",
-            "examples": [
-                ('Add my 1969 Mustang', 'Added to your garage! {{ADD:Ford|1969 Mustang}}'),
-                ('Remove the Supra', 'Removed from your collection. {{REMOVE:Toyota|Supra}}'),
-            ],
-            "rec_question": "what types of cars interest you (JDM, muscle, classics, etc.)"
-        },
-        "sneakers": {
-            "item_name": "pairs",
-            "field1": "Brand",
-            "field2": "Model/Colorway",
-            "examples": [
-                ('Add Jordan 1 Chicago', 'Added to your collection! {{ADD:Nike|Air Jordan 1 Chicago}}'),
-                ('Remove the Yeezys', 'Removed from your collection. {{REMOVE:Adidas|Yeezy 350}}'),
-            ],
-            "rec_question": "what brands or silhouettes you're into"
-        },
-        "watches": {
-            "item_name": "watches",
-            "field1": "Brand",
-            "field2": "Model",
-            "examples": [
-                ('Add my Submariner', 'Added to your collection! {{ADD:Rolex|Submariner}}'),
-                ('Remove the Speedmaster', 'Removed from your collection. {{REMOVE:Omega|Speedmaster}}'),
-            ],
-            "rec_question": "what styles or brands interest you"
-        },
-        "comics": {
-            "item_name": "comics",
-            "field1": "Publisher/Series",
-            "field2": "Issue",
-            "examples": [
-                ('Add Amazing Spider-Man 300', 'Added to your collection! {{ADD:Marvel Amazing Spider-Man|#300}}'),
-                ('Remove Detective Comics 27', 'Removed from your collection. {{REMOVE:DC Detective Comics|#27}}'),
-            ],
-            "rec_question": "what publishers, characters, or eras you collect"
-        },
-        "video-games": {
-            "item_name": "games",
-            "field1": "Platform",
-            "field2": "Title",
-            "examples": [
-                ('Add Zelda Ocarina of Time', 'Added to your collection! {{ADD:N64|The Legend of Zelda: Ocarina of Time}}'),
-                ('Remove Mario Kart', 'Removed from your collection. {{REMOVE:Switch|Mario Kart 8}}'),
-            ],
-            "rec_question": "what platforms or genres you enjoy"
-        },
-    }
 
-    config = category_config.get(category_slug, category_config["vinyl"])
+def _build_prompt_template(category_slug: str) -> tuple[str, str, str]:
+    """
+    Assemble the static parts of a category's system prompt.
+    Returns (head, middle, tail): the prompt is head + count + middle + collection list + tail.
+    """
+    config = CATEGORY_PROMPT_CONFIG.get(category_slug, CATEGORY_PROMPT_CONFIG["vinyl"])
 
     if category_slug and category_slug != "vinyl" and category_slug in CATEGORY_AI_PROMPTS:
-        base_prompt = category_prompt
+        base_prompt = CATEGORY_AI_PROMPTS[category_slug]
     else:
         base_prompt = """You are a helpful vinyl record collection assistant. You help users manage their vinyl collection."""
 
     examples_text = "\n".join([f'- User: "{ex[0]}" → "{ex[1]}"' for ex in config["examples"]])
 
-    return f"""{base_prompt}
+    head = f"""{base_prompt}
 
-CURRENT COLLECTION ({len(collection)} {config["item_name"]}):
-{collection_list}
+CURRENT COLLECTION ("""
+    middle = f""" {config["item_name"]}):
+"""
+    tail = f"""
 
 ACTIONS YOU CAN PERFORM:
 When the user asks you to add, remove, or showcase items, include the appropriate action tags in your response.
@@ -230,6 +259,43 @@ CASUAL CONVERSATION:
 - It's okay to chat casually without every response being about managing the collection
 
 IMPORTANT: Your response should be friendly and natural. Be helpful and knowledgeable. The action tags will be processed automatically. Do NOT explain your reasoning or show your thought process - just give the answer directly."""
+    return head, middle, tail
+
+
+# Precomputed prompt templates per category ("vinyl" doubles as the default)
+SYSTEM_PROMPT_TEMPLATES = {slug: _build_prompt_template(slug) for slug in CATEGORY_PROMPT_CONFIG}
+
+
+def build_system_prompt(collection: list[Album], category_slug: Optional[str] = None) -> str:
+    """Build system prompt with collection context and optional category customization"""
+    config = CATEGORY_PROMPT_CONFIG.get(category_slug, CATEGORY_PROMPT_CONFIG["vinyl"])
+    head, middle, tail = SYSTEM_PROMPT_TEMPLATES.get(category_slug, SYSTEM_PROMPT_TEMPLATES["vinyl"])
+
+    # List at most PROMPT_COLLECTION_LIMIT items; summarize the rest in one line
+    if collection:
+        lines = [f"- {a.artist} - {a.album}" for a in itertools.islice(collection, PROMPT_COLLECTION_LIMIT)]
+        remaining = len(collection) - PROMPT_COLLECTION_LIMIT
+        if remaining > 0:
+            lines.append(f"- ...and {remaining} more {config['item_name']} not listed (they are still in the collection)")
+        collection_list = "\n".join(lines)
+    else:
+        collection_list = "(empty)"
+
+    return f"{head}{len(collection)}{middle}{collection_list}{tail}"
+
+
+# Action tags: {ADD:Field1|Field2} or {{ADD:Field1|Field2}} (1-2 braces)
+ACTION_TAG_PATTERN = re.compile(r'\{+(ADD|REMOVE|SHOWCASE):([^|]+)\|([^}]+)\}+', re.IGNORECASE)
+# Anything tag-shaped, including malformed tags, is stripped from display
+ACTION_TAG_STRIP_PATTERN = re.compile(r'\{\{?(?:ADD|REMOVE|SHOWCASE):[^}]+\}\}?', re.IGNORECASE)
+
+# Template placeholders from the category prompts (e.g. {{ADD:Artist|Album}}), never real items
+PLACEHOLDER_FIELD1S = frozenset({
+    'artist', 'artist name', 'country denomination', 'set', 'set/brand', 'year', 'brand', 'publisher', 'platform'
+})
+PLACEHOLDER_FIELD2S = frozenset({
+    'album', 'album title', 'year', 'card name', 'make model', 'model colorway', 'model reference', 'series issue', 'title'
+})
 
 
 def parse_actions(response: str) -> tuple[list[Album], list[Album], list[Album]]:
@@ -238,31 +304,31 @@ def parse_actions(response: str) -> tuple[list[Album], list[Album], list[Album]]
     albums_to_remove = []
     albums_to_showcase = []
 
-    # Pattern: {ADD:Artist|Album} or {{ADD:Artist|Album}}
-    # Use single pattern that handles both (1-2 braces)
-    patterns = [
-        (r'\{+ADD:([^|]+)\|([^}]+)\}+', albums_to_add),
-        (r'\{+REMOVE:([^|]+)\|([^}]+)\}+', albums_to_remove),
-        (r'\{+SHOWCASE:([^|]+)\|([^}]+)\}+', albums_to_showcase),
-    ]
+    # Bucket tags by action in a single pass; each tag is parsed on its own so
+    # a malformed tag can't swallow the one after it
+    matches = {"ADD": [], "REMOVE": [], "SHOWCASE": []}
+    for tag in ACTION_TAG_STRIP_PATTERN.finditer(response):
+        match = ACTION_TAG_PATTERN.fullmatch(tag.group(0))
+        if match:
+            matches[match.group(1).upper()].append(match)
 
-    # Track seen items to avoid duplicates
+    # Track seen items to avoid duplicates (ADD takes precedence, then REMOVE, then SHOWCASE)
     seen = set()
 
-    for pattern, target_list in patterns:
-        for match in re.finditer(pattern, response, re.IGNORECASE):
-            artist = match.group(1).strip()
-            album = match.group(2).strip()
+    for action, target_list in (("ADD", albums_to_add), ("REMOVE", albums_to_remove), ("SHOWCASE", albums_to_showcase)):
+        for match in matches[action]:
+            artist = match.group(2).strip()
+            album = match.group(3).strip()
+            artist_lc = artist.lower()
+            album_lc = album.lower()
 
             # Create unique key for deduplication
-            key = f"{artist.lower()}|{album.lower()}"
+            key = f"{artist_lc}|{album_lc}"
 
             # Validate: must have meaningful content and not a duplicate
-            if artist and album and len(artist) > 1 and len(album) > 1 and key not in seen:
+            if len(artist) > 1 and len(album) > 1 and key not in seen:
                 # Skip if it looks like template/placeholder from any category
-                placeholder_field1s = ['artist', 'artist name', 'country denomination', 'set', 'set/brand', 'year', 'brand', 'publisher', 'platform']
-                placeholder_field2s = ['album', 'album title', 'year', 'card name', 'make model', 'model colorway', 'model reference', 'series issue', 'title']
-                if artist.lower() not in placeholder_field1s and album.lower() not in placeholder_field2s:
+                if artist_lc not in PLACEHOLDER_FIELD1S and album_lc not in PLACEHOLDER_FIELD2S:
                     target_list.append(Album(artist=artist, album=album))
                     seen.add(key)
 
@@ -281,67 +347,126 @@ CATEGORY_REC_FALLBACKS = {
 }
 
 
+# Singular item noun per category (used in user-facing notes)
+CATEGORY_ITEM_NAMES = {
+    "vinyl": "album",
+    "trading-cards": "card",
+    "cars": "vehicle",
+    "sneakers": "sneaker",
+    "watches": "watch",
+    "comics": "comic",
+    "video-games": "game",
+    "coins": "coin"
+}
+
+
+# Thinker model reasoning blocks: <think>...</think> or <thinking>...</thinking>
+THINK_BLOCK_PATTERN = re.compile(r'<(think(?:ing)?)>[\s\S]*?</\1>', re.IGNORECASE)
+
+# Responses that START with obvious AI reasoning (not normal conversation)
+# Only catch clear reasoning dumps, not normal conversational starters.
+# One anchored alternation, matched once against the stripped response.
+POLLUTED_START_PATTERN = re.compile(r'^\.?\s*(?:' + '|'.join([
+    r'According to the rules',
+    r'The user asks',
+    r'The user wants',
+    r'The user is asking',
+    r'We have a user',
+    r'We need to check',
+    r'We should check',
+    r'We must follow',
+    r'Should be no action',
+    r'No action tags',
+    r'Let\'s think',
+    r'Let\'s analyze',
+    r'First,\s+I need',
+    r'So,?\s+we need',
+    r'So,?\s+the user',
+    r'The collection contains',
+    r'I need to analyze',
+    r'I should check',
+    r'Looking at the rules',
+    r'Based on the rules',
+    r'Since the user',
+    r'Given that the',
+]) + ')', re.IGNORECASE)
+
+# Useful content to salvage from a polluted response, in priority order
+EXTRACTION_PATTERNS = [re.compile(p) for p in [
+    # 'Album Name' by Artist
+    r"'([^']+)'\s+by\s+([A-Za-z][A-Za-z\s]+?)(?:\.|,|\"|'|$)",
+    # "Album Name" by Artist
+    r'"([^"]+)"\s+by\s+([A-Za-z][A-Za-z\s]+?)(?:\.|,|\"|\'|$)',
+    # Artist - Album pattern
+    r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+-\s+([A-Z][^,\.\n]+)",
+    # How about X?
+    r"How about ['\"]?([^'\"?]+)['\"]?\?",
+    # Consider X
+    r"Consider ['\"]?([^'\"\.]+)['\"]?",
+    # try X
+    r"[Yy]ou might like ['\"]?([^'\"\.]+)['\"]?",
+]]
+TRAILING_PAREN_PATTERN = re.compile(r'\s*\([^)]*$')
+
+# Start of obvious AI reasoning blocks mid-response (truncated from the earliest match)
+REASONING_START_PATTERN = re.compile('|'.join([
+    r'[\.\s]+According to the rules',
+    r'[\.\s]+The user asks for',
+    r'[\.\s]+The user wants me to',
+    r'[\.\s]+The user is asking',
+    r'[\.\s]+We need to check',
+    r'[\.\s]+We should check',
+    r'[\.\s]+We must follow',
+    r'[\.\s]+Should be no action',
+    r'[\.\s]+No action tags needed',
+    r'[\.\s]+Let\'s think about',
+    r'[\.\s]+Let me think about',
+    r'[\.\s]+The collection contains',
+    r'\n\nWe need to check',
+    r'\n\nThe user is asking',
+]), re.IGNORECASE)
+
+# Runs of 3+ bullet lines that look like internal analysis:
+# "- Artist - Album (Genre)" or "- Artist - Album?"
+ANALYSIS_LIST_PATTERN = re.compile(
+    r'(?:^[^\S\n]*-[^\S\n]+[A-Za-z].*-.*(?:\(.*\)|\?).*(?:\n|\Z)){3,}',
+    re.MULTILINE
+)
+
+EXTRA_NEWLINES_PATTERN = re.compile(r'\n{3,}')
+EXTRA_SPACES_PATTERN = re.compile(r'  +')
+
+
 def clean_response(response: str, category_slug: Optional[str] = None) -> str:
     """
     Clean the model response for display to user.
     Removes thinking blocks, chain-of-thought reasoning, and action tags.
     """
+    # Fast path: a plain single-line reply has nothing for the passes below to
+    # remove (no think block, tags, list lines or runs of spaces/newlines)
+    stripped = response.strip()
+    if (
+        len(stripped) >= 3
+        and '<' not in stripped and '{' not in stripped
+        and '\n' not in stripped and '  ' not in stripped
+        and not POLLUTED_START_PATTERN.match(stripped)
+        and not REASONING_START_PATTERN.search(response)
+    ):
+        return stripped
+
     cleaned = response
-    fallback_msg = CATEGORY_REC_FALLBACKS.get(category_slug, CATEGORY_REC_FALLBACKS["vinyl"])
-
-    # Remove <think>...</think> blocks (Thinker model reasoning)
-    cleaned = re.sub(r'<think>[\s\S]*?</think>', '', cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'<thinking>[\s\S]*?</thinking>', '', cleaned, flags=re.IGNORECASE)
-
-    # Check if response STARTS with obvious AI reasoning (not normal conversation)
-    # Only catch clear reasoning dumps, not normal conversational starters
-    polluted_starts = [
-        r'^\.?\s*According to the rules',
-        r'^\.?\s*The user asks',
-        r'^\.?\s*The user wants',
-        r'^\.?\s*The user is asking',
-        r'^\.?\s*We have a user',
-        r'^\.?\s*We need to check',
-        r'^\.?\s*We should check',
-        r'^\.?\s*We must follow',
-        r'^\.?\s*Should be no action',
-        r'^\.?\s*No action tags',
-        r'^\.?\s*Let\'s think',
-        r'^\.?\s*Let\'s analyze',
-        r'^\.?\s*First,\s+I need',
-        r'^\.?\s*So,?\s+we need',
-        r'^\.?\s*So,?\s+the user',
-        r'^\.?\s*The collection contains',
-        r'^\.?\s*I need to analyze',
-        r'^\.?\s*I should check',
-        r'^\.?\s*Looking at the rules',
-        r'^\.?\s*Based on the rules',
-        r'^\.?\s*Since the user',
-        r'^\.?\s*Given that the',
-    ]
 
-    is_polluted = any(re.match(p, cleaned.strip(), re.IGNORECASE) for p in polluted_starts)
+    # Remove <think>...</think> and <thinking>...</thinking> blocks (Thinker model reasoning)
+    if '<' in cleaned:
+        cleaned = THINK_BLOCK_PATTERN.sub('', cleaned)
+
+    is_polluted = POLLUTED_START_PATTERN.match(cleaned.strip()) is not None
 
     if is_polluted:
         # Try to extract useful content from the polluted response
         # Look for album recommendations in various formats
-        extraction_patterns = [
-            # 'Album Name' by Artist
-            r"'([^']+)'\s+by\s+([A-Za-z][A-Za-z\s]+?)(?:\.|,|\"|'|$)",
-            # "Album Name" by Artist
-            r'"([^"]+)"\s+by\s+([A-Za-z][A-Za-z\s]+?)(?:\.|,|\"|\'|$)',
-            # Artist - Album pattern
-            r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+-\s+([A-Z][^,\.\n]+)",
-            # How about X?
-            r"How about ['\"]?([^'\"?]+)['\"]?\?",
-            # Consider X
-            r"Consider ['\"]?([^'\"\.]+)['\"]?",
-            # try X
-            r"[Yy]ou might like ['\"]?([^'\"\.]+)['\"]?",
-        ]
-
-        for i, pattern in enumerate(extraction_patterns):
-            match = re.search(pattern, cleaned)
+        for i, pattern in enumerate(EXTRACTION_PATTERNS):
+            match = pattern.search(cleaned)
             if match:
                 groups = match.groups()
                 if len(groups) >= 2:
@@ -354,7 +479,7 @@ def clean_response(response: str, category_slug: Optional[str] = None) -> str:
                         album, artist = groups[0].strip(), groups[1].strip()
 
                     # Clean up any trailing punctuation or parentheses
-                    album = re.sub(r'\s*\([^)]*$', '', album).strip()
+                    album = TRAILING_PAREN_PATTERN.sub('', album).strip()
 
                     if len(album) > 2 and len(artist) > 2:
                         cleaned = f"How about '{album}' by {artist}? Great addition to your collection!"
@@ -365,80 +490,29 @@ def clean_response(response: str, category_slug: Optional[str] = None) -> str:
                     break
         else:
             # No extractable content, return context-aware fallback
-            return fallback_msg
-
-    # Truncate from the start of obvious AI reasoning blocks (not normal conversation)
-    reasoning_start_markers = [
-        r'[\.\s]+According to the rules',
-        r'[\.\s]+The user asks for',
-        r'[\.\s]+The user wants me to',
-        r'[\.\s]+The user is asking',
-        r'[\.\s]+We need to check',
-        r'[\.\s]+We should check',
-        r'[\.\s]+We must follow',
-        r'[\.\s]+Should be no action',
-        r'[\.\s]+No action tags needed',
-        r'[\.\s]+Let\'s think about',
-        r'[\.\s]+Let me think about',
-        r'[\.\s]+The collection contains',
-        r'\n\nWe need to check',
-        r'\n\nThe user is asking',
-    ]
-
-    for marker in reasoning_start_markers:
-        match = re.search(marker, cleaned, re.IGNORECASE)
-        if match:
-            cleaned = cleaned[:match.start()]
-
-    # Remove any remaining inline reasoning fragments (specific AI reasoning phrases)
-    inline_reasoning = [
-        r'\. According to the rules[^\.]*\.',
-        r'\. The user asks for[^\.]*\.',
-        r'\. No action tags needed[^\.]*\.',
-        r'\. Should be no action[^\.]*\.',
-    ]
+            return CATEGORY_REC_FALLBACKS.get(category_slug, CATEGORY_REC_FALLBACKS["vinyl"])
 
-    for pattern in inline_reasoning:
-        cleaned = re.sub(pattern, '.', cleaned, flags=re.IGNORECASE)
+    # Truncate from the start of obvious AI reasoning blocks (not normal conversation).
+    # This also covers inline fragments like ". According to the rules ..." since
+    # everything from the first marker on is dropped.
+    match = REASONING_START_PATTERN.search(cleaned)
+    if match:
+        cleaned = cleaned[:match.start()]
 
     # Remove bullet lists of albums that look like internal analysis
     # (e.g., "- Pink Floyd - Dark Side of the Moon (Progressive Rock)")
-    lines = cleaned.split('\n')
-    filtered_lines = []
-    consecutive_list_items = 0
-    temp_list_items = []
-
-    for line in lines:
-        stripped = line.strip()
-        # Check if this looks like internal album listing with genre analysis
-        is_analysis_list = (
-            re.match(r'^-\s+[A-Za-z].*-.*\(.*\)', stripped) or  # Album with (Genre)
-            re.match(r'^-\s+[A-Za-z].*-.*\?', stripped)  # Album with question
-        )
-        if is_analysis_list:
-            consecutive_list_items += 1
-            temp_list_items.append(line)
-        else:
-            # If we had fewer than 3 analysis-style items, keep them
-            if consecutive_list_items < 3:
-                filtered_lines.extend(temp_list_items)
-            consecutive_list_items = 0
-            temp_list_items = []
-            filtered_lines.append(line)
-
-    if consecutive_list_items < 3:
-        filtered_lines.extend(temp_list_items)
-
-    cleaned = '\n'.join(filtered_lines)
+    if '-' in cleaned:
+        cleaned = ANALYSIS_LIST_PATTERN.sub('', cleaned)
 
     # Remove action tags from display
-    cleaned = re.sub(r'\{\{?ADD:[^}]+\}\}?', '', cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'\{\{?REMOVE:[^}]+\}\}?', '', cleaned, flags=re.IGNORECASE)
-    cleaned = re.sub(r'\{\{?SHOWCASE:[^}]+\}\}?', '', cleaned, flags=re.IGNORECASE)
+    if '{' in cleaned:
+        cleaned = ACTION_TAG_STRIP_PATTERN.sub('', cleaned)
 
     # Clean up extra whitespace
-    cleaned = re.sub(r'\n{3,}', '\n\n', cleaned)
-    cleaned = re.sub(r'  +', ' ', cleaned)
+    if '\n\n\n' in cleaned:
+        cleaned = EXTRA_NEWLINES_PATTERN.sub('\n\n', cleaned)
+    if '  ' in cleaned:
+        cleaned = EXTRA_SPACES_PATTERN.sub(' ', cleaned)
     cleaned = cleaned.strip()
 
     # If nothing left, provide default response
@@ -448,6 +522,39 @@ def clean_response(response: str, category_slug: Optional[str] = None) -> str:
     return cleaned
 
 
+# Trading card game keywords, matched against whole words of "set card name".
+# Multi-word phrases are matched against the space-joined words.
+CARD_GAME_KEYWORDS = [
+    ("pokemon", frozenset({"pokemon", "pikachu", "charizard", "bulbasaur", "squirtle", "jungle",
+                           "fossil", "neo", "ex", "gx", "vmax", "scarlet", "violet"}),
+     ("base set", "v star")),
+    ("mtg", frozenset({"magic", "mtg", "mox", "alpha", "beta", "unlimited", "mana",
+                       "planeswalker", "commander"}),
+     ("black lotus", "dual land")),
+    ("yugioh", frozenset({"yugioh", "exodia"}),
+     ("yu gi oh", "dark magician", "blue eyes", "duel monsters")),
+    ("sports", frozenset({"topps", "panini", "bowman", "prizm", "donruss", "nba", "nfl", "mlb",
+                          "nhl", "rookie", "autograph", "jersey"}),
+     ("upper deck",)),
+]
+CARD_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Creature-type words that suggest an unrecognized card is MTG (substring match on the card name)
+MTG_CARD_NAME_HINTS = ("dragon", "wizard", "knight", "elemental", "zombie", "goblin", "angel", "demon")
+
+
+def detect_card_game(field1: str, field2: str) -> Optional[str]:
+    """Detect the trading card game from keywords: pokemon, mtg, yugioh, sports, or None"""
+    words = CARD_WORD_PATTERN.findall(f"{field1} {field2}".lower())
+    word_set = set(words)
+    joined = f" {' '.join(words)} "
+
+    for game, keywords, phrases in CARD_GAME_KEYWORDS:
+        if not word_set.isdisjoint(keywords) or any(f" {p} " in joined for p in phrases):
+            return game
+    return None
+
+
 async def search_for_item(
     field1: str,
     field2: str,
@@ -473,31 +580,16 @@ async def search_for_item(
         return await search_discogs_for_album(field1, field2, discogs_key, discogs_secret)
 
     elif category_slug == "trading-cards":
-        # Detect card type based on keywords
-        query_lower = f"{field1} {field2}".lower()
-
-        pokemon_keywords = ["pokemon", "pikachu", "charizard", "bulbasaur", "squirtle", "base set",
-                          "jungle", "fossil", "neo", "ex", "gx", "vmax", "v star", "scarlet", "violet"]
-        mtg_keywords = ["magic", "mtg", "black lotus", "mox", "dual land", "alpha", "beta",
-                       "unlimited", "mana", "planeswalker", "commander"]
-        yugioh_keywords = ["yugioh", "yu-gi-oh", "yu gi oh", "dark magician", "blue eyes",
-                          "exodia", "duel monsters"]
-        sports_keywords = ["topps", "panini", "upper deck", "bowman", "prizm", "donruss",
-                          "nba", "nfl", "mlb", "nhl", "rookie", "autograph", "jersey"]
-
-        is_pokemon = any(kw in query_lower for kw in pokemon_keywords)
-        is_mtg = any(kw in query_lower for kw in mtg_keywords)
-        is_yugioh = any(kw in query_lower for kw in yugioh_keywords)
-        is_sports = any(kw in query_lower for kw in sports_keywords)
-
-        if is_pokemon:
+        card_game = detect_card_game(field1, field2)
+
+        if card_game == "pokemon":
             # Pokemon cards - only use Pokemon TCG API, no Scryfall fallback
             return await search_pokemon_tcg(field1, field2)
-        elif is_mtg:
+        elif card_game == "mtg":
             return await search_scryfall(field1, field2)
-        elif is_yugioh or is_sports:
+        elif card_game in ("yugioh", "sports"):
             # No free API for Yu-Gi-Oh or sports cards - user needs to add photo
-            print(f"[Search] No API for {'Yu-Gi-Oh' if is_yugioh else 'sports'} cards")
+            print(f"[Search] No API for {'Yu-Gi-Oh' if card_game == 'yugioh' else 'sports'} cards")
             return Album(artist=field1, album=field2)
         else:
             # Unknown card type - try Pokemon first (no MTG fallback to avoid mixing results)
@@ -505,8 +597,8 @@ async def search_for_item(
             if not result.cover:
                 # If Pokemon didn't find it, try Scryfall for MTG
                 # But check first if it looks like a real MTG card name
-                mtg_card_patterns = ["dragon", "wizard", "knight", "elemental", "zombie", "goblin", "angel", "demon"]
-                if any(p in field2.lower() for p in mtg_card_patterns):
+                field2_lc = field2.lower()
+                if any(p in field2_lc for p in MTG_CARD_NAME_HINTS):
                     result = await search_scryfall(field1, field2)
             return result
 
@@ -520,8 +612,417 @@ async def search_for_item(
         return Album(artist=field1, album=field2)
 
 
+def get_enrichment_cache_key(field1: str, field2: str, category_slug: str) -> str:
+    """Generate a consistent cache key for an enrichment lookup"""
+    key = f"{category_slug}:{field1.lower().strip()}:{field2.lower().strip()}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+async def cached_search_for_item(
+    field1: str,
+    field2: str,
+    category_slug: str,
+    env,
+    pending_writes: Optional[list[tuple[str, Album]]] = None
+) -> Album:
+    """
+    search_for_item with caching.
+    Checks the in-memory LRU, then R2, before hitting the external API.
+    Only results that found an image are cached so transient misses are retried.
+    If pending_writes is given, fresh results are queued there for one batched
+    R2 write instead of being written before returning.
+    """
+    cache_key = get_enrichment_cache_key(field1, field2, category_slug)
+
+    album = await get_cached_enrichment(env, cache_key)
+    if album is not None:
+        return album
+
+    album = await search_for_item(field1, field2, category_slug, env.DISCOGS_KEY, env.DISCOGS_SECRET)
+    if album.cover:
+        if pending_writes is not None:
+            remember_enrichment(cache_key, album)
+            pending_writes.append((cache_key, album))
+        else:
+            await save_cached_enrichment(env, cache_key, album)
+    return album
+
+
+async def get_cached_enrichment(env, cache_key: str) -> Optional[Album]:
+    """Get an enrichment result from the in-memory LRU, then R2, if still fresh"""
+    album = _enrich_memo.get(cache_key)
+    if album is not None:
+        _enrich_memo.move_to_end(cache_key)
+        return album
+
+    if not hasattr(env, 'CACHE') or env.CACHE is None:
+        return None
+    try:
+        obj = await env.CACHE.get(f"enrich/{cache_key}.json")
+        if obj:
+            entry = json.loads(await obj.text())
+            if time.time() - entry.get("cached_at", 0) < ENRICH_CACHE_TTL:
+                album = Album(**entry["album"])
+                remember_enrichment(cache_key, album)
+                return album
+            # Expired - drop it so stale lookups don't accumulate in the bucket
+            await env.CACHE.delete(f"enrich/{cache_key}.json")
+    except Exception as e:
+        print(f"[Chat] Enrichment cache read error: {type(e).__name__}: {e}")
+    return None
+
+
+def remember_enrichment(cache_key: str, album: Album) -> None:
+    """Store an enrichment result in the in-memory LRU"""
+    _enrich_memo[cache_key] = album
+    if len(_enrich_memo) > ENRICH_MEMO_SIZE:
+        _enrich_memo.popitem(last=False)
+
+
+async def save_cached_enrichment(env, cache_key: str, album: Album) -> None:
+    """Store an enrichment result in the in-memory LRU and R2"""
+    remember_enrichment(cache_key, album)
+    if not hasattr(env, 'CACHE') or env.CACHE is None:
+        return
+    try:
+        await env.CACHE.put(
+            f"enrich/{cache_key}.json",
+            json.dumps({"album": album.model_dump(), "cached_at": int(time.time())}),
+            httpMetadata={"contentType": "application/json"}
+        )
+    except Exception as e:
+        print(f"[Chat] Enrichment cache write error: {type(e).__name__}: {e}")
+
+
+def build_chat_messages(body: ChatMessage) -> list[dict]:
+    """Build the Together.ai messages list: system prompt, recent history, current message"""
+    return [
+        {"role": "system", "content": build_system_prompt(body.collection, body.category_slug)},
+        *body.history[-CHAT_HISTORY_LIMIT:],
+        {"role": "user", "content": body.message}
+    ]
+
+
+def choose_max_tokens(message: str) -> int:
+    """Pick a generation cap from the user's message intent"""
+    if ACTION_INTENT_PATTERN.search(message):
+        return MAX_TOKENS_DEFAULT
+    return MAX_TOKENS_CHAT
+
+
+@functools.lru_cache(maxsize=1)
+def together_headers(api_key: str):
+    """JS headers object for Together.ai, built once per API key"""
+    return to_js({
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }, dict_converter=js.Object.fromEntries)
+
+
+async def fetch_completion(
+    env,
+    messages: list[dict],
+    stream: bool = False,
+    max_tokens: int = MAX_TOKENS_DEFAULT
+):
+    """POST the chat completion request to Together.ai and return the raw fetch response"""
+    payload = {
+        "model": CHAT_MODEL,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "temperature": CHAT_TEMPERATURE,
+        "top_p": 0.9
+    }
+    if stream:
+        payload["stream"] = True
+
+    # Serialize the body in Python and convert the options once - the messages list
+    # (with the collection-heavy system prompt) never crosses the JS bridge as objects
+    response = await js.fetch(TOGETHER_API_URL, to_js({
+        "method": "POST",
+        "headers": together_headers(str(env.TOGETHER_API_KEY)),
+        "body": json.dumps(payload)
+    }, dict_converter=js.Object.fromEntries))
+
+    if response.status != 200:
+        error_text = await response.text()
+        print(f"[Chat] API error: {error_text[:200]}")
+        raise HTTPException(status_code=response.status, detail="AI service error")
+
+    return response
+
+
+async def iter_completion_stream(response):
+    """
+    Yield content deltas from a streaming (SSE) Together.ai response.
+    Reads the fetch ReadableStream directly so tokens are forwarded as they arrive.
+    """
+    reader = response.body.getReader()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+
+    while True:
+        chunk = await reader.read()
+        if chunk.done:
+            break
+        buffer += decoder.decode(chunk.value.to_bytes())
+
+        # SSE events are newline-delimited; keep any partial line for the next chunk
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            line = line.strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            choices = json.loads(data).get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+
+THINK_OPEN_PATTERN = re.compile(r'<(think(?:ing)?)>', re.IGNORECASE)
+# A block closes only on the tag it opened with, as in THINK_BLOCK_PATTERN
+THINK_CLOSE_PATTERNS = {
+    "think": re.compile(r'</think>', re.IGNORECASE),
+    "thinking": re.compile(r'</thinking>', re.IGNORECASE),
+}
+THINK_TAG_MAX_LEN = len("</thinking>")
+
+
+class ThinkBlockFilter:
+    """
+    Drops <think>/<thinking> block content from streamed deltas.
+    A tag can be split across deltas, so a trailing '<...' that could still
+    become one is held back until the next delta decides it.
+    """
+
+    def __init__(self):
+        self.close_pattern = None
+        self.held = ""
+
+    def feed(self, delta: str) -> str:
+        """Return the visible part of delta"""
+        text = self.held + delta
+        self.held = ""
+        visible = []
+
+        while text:
+            if self.close_pattern:
+                match = self.close_pattern.search(text)
+                if match:
+                    self.close_pattern = None
+                    text = text[match.end():]
+                    continue
+            else:
+                match = THINK_OPEN_PATTERN.search(text)
+                if match:
+                    visible.append(text[:match.start()])
+                    self.close_pattern = THINK_CLOSE_PATTERNS[match.group(1).lower()]
+                    text = text[match.end():]
+                    continue
+
+            # Hold back a possible partial tag at the end
+            cut = text.rfind("<", max(0, len(text) - THINK_TAG_MAX_LEN + 1))
+            if cut != -1 and ">" not in text[cut:]:
+                self.held = text[cut:]
+                text = text[:cut]
+            if not self.close_pattern:
+                visible.append(text)
+            break
+
+        return "".join(visible)
+
+    def flush(self) -> str:
+        """Return any held-back text once the stream has ended"""
+        held, self.held = self.held, ""
+        return "" if self.close_pattern else held
+
+
+# Card games whose API can look up many cards in one request
+BULK_CARD_LOOKUPS = {
+    "mtg": search_scryfall_bulk,
+    "pokemon": search_pokemon_tcg_bulk,
+}
+
+
+class PendingEnrichments:
+    """
+    Enrichment lookups for one chat turn.
+    Tasks are started as soon as an item is known (possibly mid-stream) and are
+    reused when the final response is assembled, bounded by ENRICH_CONCURRENCY.
+    """
+
+    def __init__(self, category: str, env):
+        self.category = category
+        self.env = env
+        self.semaphore = asyncio.Semaphore(ENRICH_CONCURRENCY)
+        self.tasks: dict[tuple[str, str], asyncio.Task] = {}
+        self.bulk_lookups: list[asyncio.Task] = []
+        self.cache_writes: list[tuple[str, Album]] = []
+
+    def schedule(self, album: Album) -> asyncio.Task:
+        """Start enriching an item, or return the task already running for it"""
+        # Case-insensitive so the same item referenced twice in a turn is fetched once
+        key = (album.artist.lower(), album.album.lower())
+        task = self.tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._enrich(album))
+            self.tasks[key] = task
+        return task
+
+    def schedule_all(self, albums: list[Album]) -> list[asyncio.Task]:
+        """
+        Schedule enrichment for a list of items.
+        MTG and Pokemon cards not already in flight or cached are resolved with
+        one batched request per game instead of one request per card.
+        """
+        if self.category == "trading-cards":
+            batches: dict[str, dict[tuple[str, str], Album]] = {game: {} for game in BULK_CARD_LOOKUPS}
+            for album in albums:
+                key = (album.artist.lower(), album.album.lower())
+                if key in self.tasks:
+                    continue
+                cache_key = get_enrichment_cache_key(album.artist, album.album, self.category)
+                if cache_key in _enrich_memo:
+                    continue
+                game = detect_card_game(album.artist, album.album)
+                if game in batches:
+                    batches[game].setdefault(key, album)
+
+            for game, batch in batches.items():
+                if len(batch) > 1:
+                    lookup = asyncio.ensure_future(self._bulk_lookup(game, list(batch.values())))
+                    self.bulk_lookups.append(lookup)
+                    for index, (key, album) in enumerate(batch.items()):
+                        self.tasks[key] = asyncio.ensure_future(self._from_bulk(lookup, index, album))
+
+        return [self.schedule(album) for album in albums]
+
+    async def _bulk_lookup(self, game: str, albums: list[Album]) -> list[Optional[Album]]:
+        """Cached results for a batch of cards, with one bulk request for the rest"""
+        cache_keys = [get_enrichment_cache_key(a.artist, a.album, self.category) for a in albums]
+        results = list(await asyncio.gather(*[get_cached_enrichment(self.env, key) for key in cache_keys]))
+
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            cards = [(albums[index].artist, albums[index].album) for index in missing]
+            for index, result in zip(missing, await BULK_CARD_LOOKUPS[game](cards)):
+                if result is not None and result.cover:
+                    remember_enrichment(cache_keys[index], result)
+                    self.cache_writes.append((cache_keys[index], result))
+                results[index] = result
+        return results
+
+    async def _from_bulk(self, lookup: asyncio.Future, index: int, album: Album) -> Album:
+        result = (await lookup)[index]
+        if result is None or not result.cover:
+            # No match in the batch - fall back to the single-card search
+            return await self._enrich(album)
+        return result
+
+    async def _enrich(self, album: Album) -> Album:
+        async with self.semaphore:
+            print(f"[Chat] Enriching: {album.artist} - {album.album}")
+            return await cached_search_for_item(
+                album.artist, album.album, self.category, self.env, self.cache_writes
+            )
+
+    async def save_cache_writes(self) -> None:
+        """Write all fresh results to the R2 cache concurrently"""
+        writes, self.cache_writes = self.cache_writes, []
+        await asyncio.gather(*[save_cached_enrichment(self.env, key, album) for key, album in writes])
+
+    def cancel_unused(self) -> None:
+        """Cancel speculative lookups that did not make it into the final response"""
+        for task in [*self.tasks.values(), *self.bulk_lookups]:
+            if not task.done():
+                task.cancel()
+
+
+async def enrich_actions(
+    albums_to_add: list[Album],
+    albums_to_showcase: list[Album],
+    category: str,
+    env,
+    enrichments: Optional[PendingEnrichments] = None
+) -> tuple[list[Album], list[Album]]:
+    """Enrich add/showcase items with the category-specific API"""
+    # Nothing to look up for categories without an API - skip task scheduling entirely
+    if category not in ENRICHMENT_CATEGORIES:
+        return list(albums_to_add), list(albums_to_showcase)
+
+    # Adds and showcases go out in one concurrent wave, reusing any lookups
+    # already started while the response was streaming
+    if enrichments is None:
+        enrichments = PendingEnrichments(category, env)
+
+    albums = albums_to_add + albums_to_showcase
+    results = await asyncio.gather(*enrichments.schedule_all(albums), return_exceptions=True)
+
+    # One failed lookup shouldn't sink the batch - keep that item un-enriched
+    enriched = []
+    for album, result in zip(albums, results):
+        if isinstance(result, BaseException):
+            print(f"[Chat] Enrichment failed for {album.artist} - {album.album}: {type(result).__name__}: {result}")
+            result = album
+        enriched.append(result)
+
+    enrichments.cancel_unused()
+    await enrichments.save_cache_writes()
+    return list(enriched[:len(albums_to_add)]), list(enriched[len(albums_to_add):])
+
+
+async def build_chat_response(
+    raw_response: str,
+    category: str,
+    env,
+    enrichments: Optional[PendingEnrichments] = None
+) -> ChatResponse:
+    """Parse actions from the raw model output, enrich them, and clean the text for display"""
+    print(f"[Chat] Raw response length: {len(raw_response)}")
+
+    # Parse actions BEFORE cleaning (tags are in the response)
+    albums_to_add, albums_to_remove, albums_to_showcase = parse_actions(raw_response)
+
+    print(f"[Chat] Actions - Add: {len(albums_to_add)}, Remove: {len(albums_to_remove)}, Showcase: {len(albums_to_showcase)}")
+
+    enriched_add, enriched_showcase = await enrich_actions(
+        albums_to_add, albums_to_showcase, category, env, enrichments
+    )
+
+    items_without_images = [
+        f"{item.artist} - {item.album}" for item in enriched_add + enriched_showcase if not item.cover
+    ]
+
+    # Clean response for display
+    cleaned_response = clean_response(raw_response, category)
+
+    # Add note if some items couldn't find images
+    if items_without_images:
+        # Customize message based on category
+        item_name = CATEGORY_ITEM_NAMES.get(category, "item")
+
+        if len(items_without_images) == 1:
+            cleaned_response += f"\n\n📷 I couldn't find an image for {items_without_images[0]}. You can add your own photo in the collection edit view."
+        else:
+            cleaned_response += f"\n\n📷 I couldn't find images for some {item_name}s. You can add your own photos in the collection edit view."
+
+    return ChatResponse(
+        response=cleaned_response,
+        albums_to_add=enriched_add,
+        albums_to_remove=albums_to_remove,
+        albums_to_showcase=enriched_showcase
+    )
+
+
 @router.post("/")
-async def chat(request: Request, body: ChatMessage, user_id: int = Depends(require_auth)) -> ChatResponse:
+async def chat(
+    request: Request,
+    body: ChatMessage,
+    user_id: int = Depends(require_auth)
+) -> ChatResponse:
     """
     Send a message to the AI assistant.
     Returns response and any album actions to perform.
@@ -532,115 +1033,51 @@ async def chat(request: Request, body: ChatMessage, user_id: int = Depends(requi
     if not body.message.strip():
         raise HTTPException(status_code=400, detail="Message required")
 
-    # Build messages for API
-    messages = [
-        {"role": "system", "content": build_system_prompt(body.collection, body.category_slug)}
-    ]
-
-    # Add history (last 10 messages)
-    for msg in body.history[-10:]:
-        messages.append(msg)
+    category = body.category_slug or "vinyl"
 
-    # Add current message
-    messages.append({"role": "user", "content": body.message})
+    messages = build_chat_messages(body)
 
     try:
-        headers = to_js({
-            "Authorization": f"Bearer {env.TOGETHER_API_KEY}",
-            "Content-Type": "application/json"
-        })
-
-        request_body = to_js({
-            "model": CHAT_MODEL,
-            "messages": messages,
-            "max_tokens": 512,
-            "temperature": 0.7,
-            "top_p": 0.9
-        })
-
-        response = await js.fetch(TOGETHER_API_URL, to_js({
-            "method": "POST",
-            "headers": headers,
-            "body": js.JSON.stringify(request_body)
-        }))
-
-        if response.status != 200:
-            error_text = await response.text()
-            print(f"[Chat] API error: {error_text[:200]}")
-            raise HTTPException(status_code=response.status, detail="AI service error")
-
-        data = (await response.json()).to_py()
+        max_tokens = choose_max_tokens(body.message)
+        response = await fetch_completion(env, messages, max_tokens=max_tokens)
+
+        data = json.loads(await response.text())
         raw_response = data["choices"][0]["message"]["content"]
+        usage = data.get("usage") or {}
+        print(f"[Chat] Tokens: {usage.get('completion_tokens')} of max {max_tokens}")
 
-        print(f"[Chat] Raw response length: {len(raw_response)}")
+        return await build_chat_response(raw_response, category, env)
 
-        # Parse actions BEFORE cleaning (tags are in the response)
-        albums_to_add, albums_to_remove, albums_to_showcase = parse_actions(raw_response)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[Chat] Error: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Sorry, I had trouble processing that. Please try again."
+        )
 
-        print(f"[Chat] Actions - Add: {len(albums_to_add)}, Remove: {len(albums_to_remove)}, Showcase: {len(albums_to_showcase)}")
 
-        # Enrich albums with category-specific API
-        category = body.category_slug or "vinyl"
-        enriched_add = []
-        items_without_images = []
+@router.post("/stream")
+async def chat_stream(request: Request, body: ChatMessage, user_id: int = Depends(require_auth)) -> StreamingResponse:
+    """
+    Streaming variant of the AI assistant (Server-Sent Events).
+    Emits `token` events with model deltas as they are generated (think blocks
+    dropped), then a final `done` event carrying the full ChatResponse (cleaned
+    text + enriched actions).
+    Clients should replace the streamed text with the `done` response.
+    """
+    env = request.scope["env"]
 
-        for album in albums_to_add:
-            print(f"[Chat] Enriching: {album.artist} - {album.album}")
-            enriched = await search_for_item(
-                album.artist,
-                album.album,
-                category,
-                env.DISCOGS_KEY,
-                env.DISCOGS_SECRET
-            )
-            enriched_add.append(enriched)
-            if not enriched.cover:
-                items_without_images.append(f"{enriched.artist} - {enriched.album}")
-
-        # Enrich showcase albums too
-        enriched_showcase = []
-        for album in albums_to_showcase:
-            enriched = await search_for_item(
-                album.artist,
-                album.album,
-                category,
-                env.DISCOGS_KEY,
-                env.DISCOGS_SECRET
-            )
-            enriched_showcase.append(enriched)
-            if not enriched.cover:
-                items_without_images.append(f"{enriched.artist} - {enriched.album}")
-
-        # Clean response for display
-        cleaned_response = clean_response(raw_response, category)
-
-        # Add note if some items couldn't find images
-        if items_without_images:
-            # Customize message based on category
-            category_item_names = {
-                "vinyl": "album",
-                "trading-cards": "card",
-                "cars": "vehicle",
-                "sneakers": "sneaker",
-                "watches": "watch",
-                "comics": "comic",
-                "video-games": "game",
-                "coins": "coin"
-            }
-            item_name = category_item_names.get(category, "item")
-
-            if len(items_without_images) == 1:
-                cleaned_response += f"\n\n📷 I couldn't find an image for {items_without_images[0]}. You can add your own photo in the collection edit view."
-            else:
-                cleaned_response += f"\n\n📷 I couldn't find images for some {item_name}s. You can add your own photos in the collection edit view."
+    if not body.message.strip():
+        raise HTTPException(status_code=400, detail="Message required")
 
-        return ChatResponse(
-            response=cleaned_response,
-            albums_to_add=enriched_add,
-            albums_to_remove=albums_to_remove,
-            albums_to_showcase=enriched_showcase
-        )
+    messages = build_chat_messages(body)
 
+    try:
+        response = await fetch_completion(
+            env, messages, stream=True, max_tokens=choose_max_tokens(body.message)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -649,3 +1086,52 @@ async def chat(request: Request, body: ChatMessage, user_id: int = Depends(requi
             status_code=500,
             detail="Sorry, I had trouble processing that. Please try again."
         )
+
+    async def event_stream():
+        category = body.category_slug or "vinyl"
+        enrichments = PendingEnrichments(category, env)
+        try:
+            raw_parts = []
+            think_filter = ThinkBlockFilter()
+            # Text after the last complete action tag - only this is rescanned
+            pending = ""
+            async for delta in iter_completion_stream(response):
+                raw_parts.append(delta)
+                visible = think_filter.feed(delta)
+                if visible:
+                    yield f"event: token\ndata: {json.dumps(visible)}\n\n"
+
+                if category not in ENRICHMENT_CATEGORIES:
+                    continue
+                pending += delta
+
+                # A closing brace may complete an action tag - start its lookup now so
+                # enrichment overlaps with the rest of the generation
+                if "}" in delta:
+                    to_add, _, to_showcase = parse_actions(pending)
+                    for album in to_add + to_showcase:
+                        enrichments.schedule(album)
+                    tag_end = 0
+                    for tag in ACTION_TAG_STRIP_PATTERN.finditer(pending):
+                        tag_end = tag.end()
+                    pending = pending[tag_end:]
+
+                # Only text from the last '{' on can still become part of a tag
+                tag_start = pending.rfind("{")
+                pending = pending[tag_start:] if tag_start != -1 else ""
+
+            tail = think_filter.flush()
+            if tail:
+                yield f"event: token\ndata: {json.dumps(tail)}\n\n"
+
+            raw_response = "".join(raw_parts)
+
+            result = await build_chat_response(raw_response, category, env, enrichments)
+            yield f"event: done\ndata: {result.model_dump_json()}\n\n"
+        except Exception as e:
+            enrichments.cancel_unused()
+            print(f"[Chat] Stream error: {e}")
+            error = {"detail": "Sorry, I had trouble processing that. Please try again."}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
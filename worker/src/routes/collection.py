@@ -2,8 +2,11 @@
 User collection CRUD and sync routes
 """
 
+from datetime import datetime
 from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
+from pyodide.ffi import to_js
 from typing import Optional
 
 from routes.auth import require_auth, require_auth, get_current_user
@@ -79,12 +82,51 @@ class CollectionStats(BaseModel):
     category_breakdown: dict[int, int] = {}  # category_id -> count
 
 
-@router.get("/")
+COLLECTION_COLUMNS = "id, artist, album, genre, cover, price, discogs_id, year, category_id, tags, condition, notes"
+
+
+def collection_rows_statement(env, user_id: int, category_id: Optional[int] = None):
+    """Bound SELECT for a user's collection, for .all() or a D1 batch"""
+    if category_id:
+        return env.DB.prepare(
+            f"""SELECT {COLLECTION_COLUMNS}
+               FROM collections
+               WHERE user_id = ? AND category_id = ?
+               ORDER BY artist, album"""
+        ).bind(user_id, category_id)
+    return env.DB.prepare(
+        f"""SELECT {COLLECTION_COLUMNS}
+           FROM collections
+           WHERE user_id = ?
+           ORDER BY artist, album"""
+    ).bind(user_id)
+
+
+def collection_rows(results) -> list[dict]:
+    """
+    Collection rows from a D1 result as plain dicts in Album shape.
+    Rows come straight from our own schema, so they skip per-row model validation.
+    """
+    rows = []
+    for row in results.results:
+        # Convert JS proxy row to Python dict
+        if hasattr(row, 'to_py'):
+            row = row.to_py()
+        rows.append({key: to_python_value(value) for key, value in row.items()})
+    return rows
+
+
+async def fetch_collection_rows(env, user_id: int, category_id: Optional[int] = None) -> list[dict]:
+    """User's collection rows as plain dicts in Album shape"""
+    return collection_rows(await collection_rows_statement(env, user_id, category_id).all())
+
+
+@router.get("/", response_model=list[Album])
 async def get_collection(
     request: Request,
     category_id: Optional[int] = None,
     user_id: int = Depends(require_auth)
-) -> list[Album]:
+) -> JSONResponse:
     """
     Get user's collection, optionally filtered by category.
     Requires authentication.
@@ -92,42 +134,7 @@ async def get_collection(
     env = request.scope["env"]
 
     try:
-        if category_id:
-            results = await env.DB.prepare(
-                """SELECT id, artist, album, genre, cover, price, discogs_id, year, category_id, tags, condition, notes
-                   FROM collections
-                   WHERE user_id = ? AND category_id = ?
-                   ORDER BY artist, album"""
-            ).bind(user_id, category_id).all()
-        else:
-            results = await env.DB.prepare(
-                """SELECT id, artist, album, genre, cover, price, discogs_id, year, category_id, tags, condition, notes
-                   FROM collections
-                   WHERE user_id = ?
-                   ORDER BY artist, album"""
-            ).bind(user_id).all()
-
-        albums = []
-        for row in results.results:
-            # Convert JS proxy row to Python dict
-            if hasattr(row, 'to_py'):
-                row = row.to_py()
-            albums.append(Album(
-                id=row["id"],
-                artist=row["artist"],
-                album=row["album"],
-                genre=to_python_value(row.get("genre")),
-                cover=to_python_value(row.get("cover")),
-                price=to_python_value(row.get("price")),
-                discogs_id=to_python_value(row.get("discogs_id")),
-                year=to_python_value(row.get("year")),
-                category_id=to_python_value(row.get("category_id")),
-                tags=to_python_value(row.get("tags")),
-                condition=to_python_value(row.get("condition")),
-                notes=to_python_value(row.get("notes"))
-            ))
-
-        return albums
+        return JSONResponse(await fetch_collection_rows(env, user_id, category_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching collection: {str(e)}")
 
@@ -151,42 +158,19 @@ async def add_album(
     try:
         # Build dynamic query for optional fields
         # D1 has issues with None/null values, so we only include fields that have values
-        fields = ["user_id", "artist", "album"]
-        values = [user_id, body.artist, body.album]
-
-        if body.genre:
-            fields.append("genre")
-            values.append(body.genre)
-        if body.cover:
-            fields.append("cover")
-            values.append(body.cover)
-        if body.price is not None:
-            fields.append("price")
-            values.append(body.price)
-        if body.discogs_id is not None:
-            fields.append("discogs_id")
-            values.append(body.discogs_id)
-        if body.year is not None:
-            fields.append("year")
-            values.append(body.year)
-        if body.category_id is not None:
-            fields.append("category_id")
-            values.append(body.category_id)
-        if body.tags:
-            fields.append("tags")
-            values.append(body.tags)
-        if body.condition:
-            fields.append("condition")
-            values.append(body.condition)
-        if body.notes:
-            fields.append("notes")
-            values.append(body.notes)
+        # (empty strings are skipped too, leaving those columns NULL)
+        data = {
+            field: value
+            for field, value in body.model_dump(exclude_none=True).items()
+            if value != ""
+        }
+        fields = ["user_id", *data]
+        values = [user_id, *data.values()]
 
         placeholders = ", ".join(["?" for _ in fields])
         field_names = ", ".join(fields)
 
         print(f"[Collection] Adding album: {body.artist} - {body.album} (category: {body.category_id})")
-        print(f"[Collection] Fields: {field_names}, Values: {values}")
 
         # Use atomic INSERT with NOT EXISTS to prevent race conditions
         # The WHERE NOT EXISTS ensures no duplicate is inserted even with concurrent requests
@@ -220,7 +204,8 @@ async def add_album(
             # NOT EXISTS check failed - album already exists
             raise HTTPException(status_code=400, detail="Album already in collection")
 
-        return Album(
+        # body is already validated - build the response without re-validating
+        return Album.model_construct(
             id=result["id"],
             artist=body.artist,
             album=body.album,
@@ -251,70 +236,50 @@ async def update_album(
     env = request.scope["env"]
 
     try:
-        # Verify ownership
-        existing = await env.DB.prepare(
-            "SELECT * FROM collections WHERE id = ? AND user_id = ?"
-        ).bind(album_id, user_id).first()
-
-        if not existing:
-            raise HTTPException(status_code=404, detail="Album not found")
-
         # Build update query dynamically
         updates = []
         values = []
 
-        if body.artist is not None:
-            updates.append("artist = ?")
-            values.append(body.artist)
-        if body.album is not None:
-            updates.append("album = ?")
-            values.append(body.album)
-        if body.genre is not None:
-            updates.append("genre = ?")
-            values.append(body.genre)
-        if body.cover is not None:
-            updates.append("cover = ?")
-            values.append(body.cover)
-        if body.price is not None:
-            updates.append("price = ?")
-            values.append(body.price)
-        if body.discogs_id is not None:
-            updates.append("discogs_id = ?")
-            values.append(body.discogs_id)
-        if body.year is not None:
-            updates.append("year = ?")
-            values.append(body.year)
+        for field in ("artist", "album", "genre", "cover", "price", "discogs_id", "year"):
+            value = getattr(body, field)
+            if value is not None:
+                updates.append(f"{field} = ?")
+                values.append(value)
+
         # For tags, notes, condition - always update if provided (even if null/empty)
         # Using __fields_set__ to detect which fields were explicitly sent in request
         fields_set = body.__fields_set__ if hasattr(body, '__fields_set__') else set()
 
-        if 'tags' in fields_set or body.tags is not None:
-            updates.append("tags = ?")
-            # Use empty string instead of None to avoid D1 type errors
-            values.append(body.tags if body.tags else "")
-        if 'condition' in fields_set or body.condition is not None:
-            updates.append("condition = ?")
-            values.append(body.condition if body.condition else "")
-        if 'notes' in fields_set or body.notes is not None:
-            updates.append("notes = ?")
-            values.append(body.notes if body.notes else "")
+        for field in ("tags", "condition", "notes"):
+            value = getattr(body, field)
+            if field in fields_set or value is not None:
+                updates.append(f"{field} = ?")
+                # Use empty string instead of None to avoid D1 type errors
+                values.append(value if value else "")
 
         if updates:
+            # The user_id filter doubles as the ownership check; RETURNING hands
+            # back the updated row so no follow-up SELECT is needed
             updates.append("updated_at = CURRENT_TIMESTAMP")
-            query = f"UPDATE collections SET {', '.join(updates)} WHERE id = ? AND user_id = ?"
-            values.extend([album_id, user_id])
-
-            await env.DB.prepare(query).bind(*values).run()
+            updated = await env.DB.prepare(
+                f"""UPDATE collections SET {', '.join(updates)}
+                   WHERE id = ? AND user_id = ?
+                   RETURNING {COLLECTION_COLUMNS}"""
+            ).bind(*values, album_id, user_id).first()
+        else:
+            # Nothing to change - just return the current record
+            updated = await env.DB.prepare(
+                f"SELECT {COLLECTION_COLUMNS} FROM collections WHERE id = ? AND user_id = ?"
+            ).bind(album_id, user_id).first()
 
-        # Fetch updated record
-        updated = await env.DB.prepare(
-            "SELECT * FROM collections WHERE id = ?"
-        ).bind(album_id).first()
+        if not updated:
+            raise HTTPException(status_code=404, detail="Album not found")
 
-        if updated and hasattr(updated, 'to_py'):
+        if hasattr(updated, 'to_py'):
             updated = updated.to_py()
 
-        return Album(
+        # Row comes from our own schema - no need to re-validate it
+        return Album.model_construct(
             id=updated["id"],
             artist=updated["artist"],
             album=updated["album"],
@@ -344,24 +309,20 @@ async def delete_album(
     env = request.scope["env"]
 
     try:
-        # Verify ownership
-        existing = await env.DB.prepare(
-            "SELECT id FROM collections WHERE id = ? AND user_id = ?"
-        ).bind(album_id, user_id).first()
-
-        if not existing:
+        # Both deletes in one atomic D1 round trip. Showcase first (D1 doesn't
+        # enforce foreign keys); the user_id filters double as the ownership check
+        _, result = await env.DB.batch(to_js([
+            env.DB.prepare(
+                "DELETE FROM showcase_albums WHERE collection_id = ? AND user_id = ?"
+            ).bind(album_id, user_id),
+            env.DB.prepare(
+                "DELETE FROM collections WHERE id = ? AND user_id = ?"
+            ).bind(album_id, user_id)
+        ]))
+
+        if not result.meta.changes:
             raise HTTPException(status_code=404, detail="Album not found")
 
-        # Delete from showcase first (D1 doesn't enforce foreign keys)
-        await env.DB.prepare(
-            "DELETE FROM showcase_albums WHERE collection_id = ? AND user_id = ?"
-        ).bind(album_id, user_id).run()
-
-        # Delete from collection
-        await env.DB.prepare(
-            "DELETE FROM collections WHERE id = ? AND user_id = ?"
-        ).bind(album_id, user_id).run()
-
         return {"status": "deleted", "id": album_id}
     except HTTPException:
         raise
@@ -369,116 +330,110 @@ async def delete_album(
         raise HTTPException(status_code=500, detail=f"Error deleting album: {str(e)}")
 
 
-@router.post("/sync")
+@router.post("/sync", response_model=SyncResponse)
 async def sync_collection(
     request: Request,
     body: SyncRequest,
     user_id: int = Depends(require_auth)
-) -> SyncResponse:
+) -> JSONResponse:
     """
     Sync offline changes with server.
     Handles adds, updates, and deletes in a single request.
     Returns the complete updated collection.
-    Uses atomic operations to prevent race conditions and data loss.
+    All writes run as one D1 batch (a single transaction).
     """
     env = request.scope["env"]
-    from datetime import datetime
 
     try:
-        # Process deletions first - batch delete for atomicity
+        # All writes go to D1 as one batch: a single round trip, run in order as
+        # one transaction
+        statements = []
+
+        # Process deletions first. deleted_ids is already validated as list[int]
+        # by SyncRequest, so the IDs can be inlined into the IN list as-is.
         if body.deleted_ids:
-            # Validate all IDs are integers
-            validated_delete_ids = []
-            for album_id in body.deleted_ids:
-                try:
-                    validated_delete_ids.append(int(album_id))
-                except (ValueError, TypeError):
-                    continue  # Skip invalid IDs
-
-            if validated_delete_ids:
-                # Batch delete in a single query
-                id_list = ", ".join(str(aid) for aid in validated_delete_ids)
-                await env.DB.prepare(
-                    f"DELETE FROM collections WHERE user_id = ? AND id IN ({id_list})"
-                ).bind(user_id).run()
-
-        # Process albums using atomic upsert pattern
+            id_list = ", ".join(str(aid) for aid in body.deleted_ids)
+            statements.append(env.DB.prepare(
+                f"DELETE FROM collections WHERE user_id = ? AND id IN ({id_list})"
+            ).bind(user_id))
+
+        # Process albums as update + guarded insert pairs. Statements in a batch run
+        # sequentially, so each INSERT's NOT EXISTS sees the UPDATE before it and
+        # only fires when that UPDATE matched nothing.
         for album in body.albums:
             if album.id:
-                # Update existing by ID - use RETURNING to verify update happened
-                result = await env.DB.prepare(
+                # Update existing by ID
+                statements.append(env.DB.prepare(
                     """UPDATE collections
                        SET artist = ?, album = ?, genre = ?, cover = ?, price = ?,
                            discogs_id = ?, year = ?, category_id = ?, tags = ?,
                            condition = ?, notes = ?, updated_at = CURRENT_TIMESTAMP
-                       WHERE id = ? AND user_id = ?
-                       RETURNING id"""
+                       WHERE id = ? AND user_id = ?"""
                 ).bind(
                     album.artist, album.album, album.genre, album.cover, album.price,
                     album.discogs_id, album.year, album.category_id, album.tags,
                     album.condition, album.notes, album.id, user_id
-                ).first()
-
-                # If update didn't match any row, the ID might be stale - try insert as fallback
-                if not result:
-                    await env.DB.prepare(
-                        """INSERT INTO collections
-                           (user_id, artist, album, genre, cover, price, discogs_id, year,
-                            category_id, tags, condition, notes)
-                           SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-                           WHERE NOT EXISTS (
-                               SELECT 1 FROM collections
-                               WHERE user_id = ? AND LOWER(artist) = LOWER(?) AND LOWER(album) = LOWER(?)
-                           )"""
-                    ).bind(
-                        user_id, album.artist, album.album, album.genre,
-                        album.cover, album.price, album.discogs_id, album.year,
-                        album.category_id, album.tags, album.condition, album.notes,
-                        user_id, album.artist, album.album
-                    ).run()
+                ))
+
+                # If the ID is stale (no such row), insert instead unless it's a duplicate
+                statements.append(env.DB.prepare(
+                    """INSERT INTO collections
+                       (user_id, artist, album, genre, cover, price, discogs_id, year,
+                        category_id, tags, condition, notes)
+                       SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+                       WHERE NOT EXISTS (
+                           SELECT 1 FROM collections WHERE id = ? AND user_id = ?
+                       ) AND NOT EXISTS (
+                           SELECT 1 FROM collections
+                           WHERE user_id = ? AND LOWER(artist) = LOWER(?) AND LOWER(album) = LOWER(?)
+                       )"""
+                ).bind(
+                    user_id, album.artist, album.album, album.genre,
+                    album.cover, album.price, album.discogs_id, album.year,
+                    album.category_id, album.tags, album.condition, album.notes,
+                    album.id, user_id, user_id, album.artist, album.album
+                ))
             else:
-                # No ID - atomic upsert: try update first, then insert if no match
-                # Use UPDATE with RETURNING to check if row was updated
-                update_result = await env.DB.prepare(
+                # No ID - merge into an existing row with the same artist/album
+                statements.append(env.DB.prepare(
                     """UPDATE collections
                        SET genre = COALESCE(?, genre), cover = COALESCE(?, cover),
                            price = COALESCE(?, price), discogs_id = COALESCE(?, discogs_id),
                            year = COALESCE(?, year), category_id = COALESCE(?, category_id),
                            tags = COALESCE(?, tags), condition = COALESCE(?, condition),
                            notes = COALESCE(?, notes), updated_at = CURRENT_TIMESTAMP
-                       WHERE user_id = ? AND LOWER(artist) = LOWER(?) AND LOWER(album) = LOWER(?)
-                       RETURNING id"""
+                       WHERE user_id = ? AND LOWER(artist) = LOWER(?) AND LOWER(album) = LOWER(?)"""
                 ).bind(
                     album.genre, album.cover, album.price, album.discogs_id,
                     album.year, album.category_id, album.tags, album.condition,
                     album.notes, user_id, album.artist, album.album
-                ).first()
-
-                if not update_result:
-                    # No existing row - atomic insert with NOT EXISTS check
-                    await env.DB.prepare(
-                        """INSERT INTO collections
-                           (user_id, artist, album, genre, cover, price, discogs_id, year,
-                            category_id, tags, condition, notes)
-                           SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-                           WHERE NOT EXISTS (
-                               SELECT 1 FROM collections
-                               WHERE user_id = ? AND LOWER(artist) = LOWER(?) AND LOWER(album) = LOWER(?)
-                           )"""
-                    ).bind(
-                        user_id, album.artist, album.album, album.genre,
-                        album.cover, album.price, album.discogs_id, album.year,
-                        album.category_id, album.tags, album.condition, album.notes,
-                        user_id, album.artist, album.album
-                    ).run()
-
-        # Get updated collection
-        albums = await get_collection(request, user_id)
-
-        return SyncResponse(
-            albums=albums,
-            synced_at=datetime.utcnow().isoformat()
-        )
+                ))
+
+                # No existing row - insert
+                statements.append(env.DB.prepare(
+                    """INSERT INTO collections
+                       (user_id, artist, album, genre, cover, price, discogs_id, year,
+                        category_id, tags, condition, notes)
+                       SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+                       WHERE NOT EXISTS (
+                           SELECT 1 FROM collections
+                           WHERE user_id = ? AND LOWER(artist) = LOWER(?) AND LOWER(album) = LOWER(?)
+                       )"""
+                ).bind(
+                    user_id, album.artist, album.album, album.genre,
+                    album.cover, album.price, album.discogs_id, album.year,
+                    album.category_id, album.tags, album.condition, album.notes,
+                    user_id, album.artist, album.album
+                ))
+
+        # Read the updated collection at the end of the same batch, after the writes
+        statements.append(collection_rows_statement(env, user_id))
+        results = await env.DB.batch(to_js(statements))
+
+        return JSONResponse({
+            "albums": collection_rows(results[len(statements) - 1]),
+            "synced_at": datetime.utcnow().isoformat()
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Sync error: {str(e)}")
 
@@ -495,59 +450,53 @@ async def get_stats(
     env = request.scope["env"]
 
     try:
-        # Get total count and value
-        totals = await env.DB.prepare(
-            """SELECT COUNT(*) as count, COALESCE(SUM(price), 0) as total_value
-               FROM collections WHERE user_id = ?"""
-        ).bind(user_id).first()
-
-        if totals and hasattr(totals, 'to_py'):
-            totals = totals.to_py()
-
-        # Get genre breakdown
-        genres_result = await env.DB.prepare(
-            """SELECT genre, COUNT(*) as count
+        # All four aggregates in one statement, each row tagged with its kind.
+        # The final ORDER BY keeps genres most-common first.
+        results = await env.DB.prepare(
+            """SELECT 'total' AS kind, NULL AS key, COUNT(*) AS count,
+                      COALESCE(SUM(price), 0) AS total_value
+               FROM collections WHERE user_id = ?
+               UNION ALL
+               SELECT 'genre', genre, COUNT(*), 0
                FROM collections
                WHERE user_id = ? AND genre IS NOT NULL
                GROUP BY genre
-               ORDER BY count DESC"""
-        ).bind(user_id).all()
-
-        genres = {}
-        for row in genres_result.results:
-            if hasattr(row, 'to_py'):
-                row = row.to_py()
-            genre_val = to_python_value(row.get("genre"))
-            if genre_val:
-                genres[genre_val] = row["count"]
-
-        # Get category breakdown
-        category_result = await env.DB.prepare(
-            """SELECT category_id, COUNT(*) as count
+               UNION ALL
+               SELECT 'category', category_id, COUNT(*), 0
                FROM collections
                WHERE user_id = ? AND category_id IS NOT NULL
-               GROUP BY category_id"""
-        ).bind(user_id).all()
+               GROUP BY category_id
+               UNION ALL
+               SELECT 'showcase', NULL, COUNT(*), 0
+               FROM showcase_albums WHERE user_id = ?
+               ORDER BY count DESC"""
+        ).bind(user_id, user_id, user_id, user_id).all()
 
+        total_albums = 0
+        total_value = 0.0
+        total_showcase = 0
+        genres = {}
         category_breakdown = {}
-        for row in category_result.results:
+        for row in results.results:
             if hasattr(row, 'to_py'):
                 row = row.to_py()
-            cat_id = to_python_value(row.get("category_id"))
-            if cat_id is not None:
-                category_breakdown[int(cat_id)] = row["count"]
-
-        # Get total showcase count across all categories
-        showcase_result = await env.DB.prepare(
-            "SELECT COUNT(*) as count FROM showcase_albums WHERE user_id = ?"
-        ).bind(user_id).first()
-        if showcase_result and hasattr(showcase_result, 'to_py'):
-            showcase_result = showcase_result.to_py()
-        total_showcase = showcase_result.get("count", 0) or 0 if showcase_result else 0
+            kind = row["kind"]
+            key = to_python_value(row.get("key"))
+            if kind == "total":
+                total_albums = row["count"] or 0
+                total_value = row["total_value"] or 0.0
+            elif kind == "genre":
+                if key:
+                    genres[key] = row["count"]
+            elif kind == "category":
+                if key is not None:
+                    category_breakdown[int(key)] = row["count"]
+            elif kind == "showcase":
+                total_showcase = row["count"] or 0
 
         return CollectionStats(
-            total_albums=totals["count"] or 0 if totals else 0,
-            total_value=totals["total_value"] or 0.0 if totals else 0.0,
+            total_albums=total_albums,
+            total_value=total_value,
             total_showcase=total_showcase,
             genres=genres,
             category_breakdown=category_breakdown
@@ -4,11 +4,13 @@ Nested comments with up to 3 levels of replies
 """
 
 import json
-from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi import APIRouter, Request, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
+from pyodide.ffi import to_js
 from .auth import require_auth
 from .blocks import get_blocked_user_ids
-from utils.conversions import to_python_value as safe_value
+from utils.conversions import to_python_value as safe_value, convert_row
 from services.email import send_forum_reply_notification
 
 router = APIRouter()
@@ -24,7 +26,11 @@ class CommentAuthor(BaseModel):
 
 
 class CommentResponse(BaseModel):
-    """Comment response with optional nested replies"""
+    """
+    Comment response with optional nested replies.
+    Schema only (OpenAPI docs) - handlers return plain dicts in this shape,
+    so the recursive replies field is never validated at runtime.
+    """
     id: int
     post_id: int
     user_id: int
@@ -58,12 +64,27 @@ class UpdateCommentRequest(BaseModel):
     body: str = Field(..., min_length=1, max_length=10000)
 
 
-@router.get("/posts/{post_id}/comments")
+def first_result(result: dict) -> dict | None:
+    """First row of a converted D1 result, or None"""
+    rows = result.get("results", [])
+    return rows[0] if rows else None
+
+
+def check_post_open(post: dict | None) -> None:
+    """Raise unless the post exists and accepts comments"""
+    if not post:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    if post.get("is_locked"):
+        raise HTTPException(status_code=403, detail="Post is locked for comments")
+
+
+@router.get("/posts/{post_id}/comments", response_model=CommentsListResponse)
 async def get_comments(
     request: Request,
     post_id: int,
     user_id: int = Depends(require_auth)
-) -> CommentsListResponse:
+) -> JSONResponse:
     """
     Get all comments for a post with nested structure.
     Returns up to 3 levels of nesting.
@@ -76,8 +97,7 @@ async def get_comments(
             "SELECT id FROM forum_posts WHERE id = ?"
         ).bind(post_id).first()
 
-        if post and hasattr(post, 'to_py'):
-            post = post.to_py()
+        post = convert_row(post)
 
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
@@ -85,92 +105,86 @@ async def get_comments(
         # Get blocked user IDs to filter out
         blocked_ids = await get_blocked_user_ids(env, user_id)
 
-        # Build query with optional blocked user filter
-        if blocked_ids:
-            placeholders = ",".join(["?" for _ in blocked_ids])
-            query = f"""SELECT c.id, c.post_id, c.user_id, c.parent_comment_id, c.body, c.images,
-                      c.upvote_count, c.downvote_count, c.created_at,
-                      u.name as author_name, u.picture as author_picture,
-                      v.value as user_vote
-               FROM forum_comments c
-               JOIN users u ON c.user_id = u.id
-               LEFT JOIN votes v ON v.comment_id = c.id AND v.user_id = ?
-               WHERE c.post_id = ? AND c.user_id NOT IN ({placeholders})
-               ORDER BY c.created_at ASC"""
-            result = await env.DB.prepare(query).bind(user_id, post_id, *blocked_ids).all()
-        else:
-            # Get all comments for the post with votes
-            result = await env.DB.prepare(
-                """SELECT c.id, c.post_id, c.user_id, c.parent_comment_id, c.body, c.images,
-                          c.upvote_count, c.downvote_count, c.created_at,
-                          u.name as author_name, u.picture as author_picture,
-                          v.value as user_vote
-                   FROM forum_comments c
-                   JOIN users u ON c.user_id = u.id
-                   LEFT JOIN votes v ON v.comment_id = c.id AND v.user_id = ?
-                   WHERE c.post_id = ?
-                   ORDER BY c.created_at ASC"""
-            ).bind(user_id, post_id).all()
-
-        if hasattr(result, 'to_py'):
-            result = result.to_py()
+        # Get all comments for the post with votes, with the reply tree resolved
+        # in SQL: each row carries its depth and rows come back parents-first.
+        # Comments whose parent isn't visible (deleted or blocked author) are
+        # roots. Blocked users are passed as one JSON array so the SQL has the
+        # same shape for any number of blocks.
+        result = await env.DB.prepare(
+            """WITH RECURSIVE visible AS (
+                 SELECT c.id, c.post_id, c.user_id, c.parent_comment_id, c.body, c.images,
+                        c.upvote_count, c.downvote_count, c.created_at,
+                        u.name as author_name, u.picture as author_picture
+                 FROM forum_comments c
+                 JOIN users u ON c.user_id = u.id
+                 WHERE c.post_id = ?
+                   AND c.user_id NOT IN (SELECT value FROM json_each(?))
+               ),
+               tree AS (
+                 SELECT visible.*, 0 AS depth FROM visible
+                 WHERE parent_comment_id IS NULL
+                    OR parent_comment_id NOT IN (SELECT id FROM visible)
+                 UNION ALL
+                 SELECT visible.*, tree.depth + 1 FROM visible
+                 JOIN tree ON visible.parent_comment_id = tree.id
+               )
+               SELECT tree.*, v.value as user_vote
+               FROM tree
+               LEFT JOIN votes v ON v.comment_id = tree.id AND v.user_id = ?
+               ORDER BY tree.depth, tree.created_at, tree.id"""
+        ).bind(post_id, json.dumps(list(blocked_ids)), user_id).all()
+
+        result = convert_row(result)
 
         rows = result.get("results", [])
 
-        # Build nested structure
+        # Build nested structure - parents always precede their replies, so a
+        # single pass can link each reply to its parent
         comments_by_id = {}
         root_comments = []
 
-        # First pass: create all comment objects
         for row in rows:
-            # Parse images JSON
+            # Parse images JSON (TEXT column - always a string or NULL)
             images_raw = safe_value(row.get("images"))
             images = []
             if images_raw:
                 try:
-                    images = json.loads(images_raw) if isinstance(images_raw, str) else images_raw
+                    images = json.loads(images_raw)
                 except (json.JSONDecodeError, TypeError) as e:
                     print(f"[Comments] Error parsing images JSON: {e}")
-                    images = []
-
-            comment = CommentResponse(
-                id=row["id"],
-                post_id=row["post_id"],
-                user_id=row["user_id"],
-                author=CommentAuthor(
-                    id=row["user_id"],
-                    name=safe_value(row.get("author_name")),
-                    picture=safe_value(row.get("author_picture"))
-                ),
-                parent_comment_id=safe_value(row.get("parent_comment_id")),
-                body=row["body"],
-                images=images,
-                upvote_count=safe_value(row.get("upvote_count"), 0),
-                downvote_count=safe_value(row.get("downvote_count"), 0),
-                user_vote=safe_value(row.get("user_vote")),
-                depth=0,
-                replies=[],
-                created_at=str(row["created_at"])
-            )
+
+            # Plain dicts in CommentResponse shape - rows come from our own schema,
+            # so per-comment model validation is skipped
+            comment = {
+                "id": row["id"],
+                "post_id": row["post_id"],
+                "user_id": row["user_id"],
+                "author": {
+                    "id": row["user_id"],
+                    "name": safe_value(row.get("author_name")),
+                    "picture": safe_value(row.get("author_picture"))
+                },
+                "parent_comment_id": safe_value(row.get("parent_comment_id")),
+                "body": row["body"],
+                "images": images,
+                "upvote_count": safe_value(row.get("upvote_count"), 0),
+                "downvote_count": safe_value(row.get("downvote_count"), 0),
+                "user_vote": safe_value(row.get("user_vote")),
+                "depth": row["depth"],
+                "replies": [],
+                "created_at": str(row["created_at"])
+            }
             comments_by_id[row["id"]] = comment
 
-        # Second pass: build tree structure
-        for comment_id, comment in comments_by_id.items():
-            if comment.parent_comment_id is None:
-                root_comments.append(comment)
+            if comment["depth"]:
+                comments_by_id[comment["parent_comment_id"]]["replies"].append(comment)
             else:
-                parent = comments_by_id.get(comment.parent_comment_id)
-                if parent:
-                    comment.depth = parent.depth + 1
-                    parent.replies.append(comment)
-                else:
-                    # Parent was deleted, show as root
-                    root_comments.append(comment)
-
-        return CommentsListResponse(
-            comments=root_comments,
-            total_count=len(rows)
-        )
+                root_comments.append(comment)
+
+        return JSONResponse({
+            "comments": root_comments,
+            "total_count": len(rows)
+        })
 
     except HTTPException:
         raise
@@ -178,13 +192,14 @@ async def get_comments(
         raise HTTPException(status_code=500, detail=f"Error fetching comments: {str(e)}")
 
 
-@router.post("/posts/{post_id}/comments")
+@router.post("/posts/{post_id}/comments", response_model=CommentResponse)
 async def create_comment(
     request: Request,
     post_id: int,
     body: CreateCommentRequest,
+    background_tasks: BackgroundTasks,
     user_id: int = Depends(require_auth)
-) -> CommentResponse:
+) -> JSONResponse:
     """
     Create a comment on a post.
     Optionally provide parent_comment_id for replies (max 3 levels deep).
@@ -192,132 +207,119 @@ async def create_comment(
     env = request.scope["env"]
 
     try:
-        # Verify post exists and not locked
-        post = await env.DB.prepare(
+        post_lookup = env.DB.prepare(
             "SELECT id, is_locked, user_id, title FROM forum_posts WHERE id = ?"
-        ).bind(post_id).first()
-
-        if post and hasattr(post, 'to_py'):
-            post = post.to_py()
+        ).bind(post_id)
 
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-
-        if post.get("is_locked"):
-            raise HTTPException(status_code=403, detail="Post is locked for comments")
+        # Serialize images to JSON
+        images_json = json.dumps(body.images) if body.images else ""
+
+        # Insert comment, comment count bump and author lookup. The INSERT and
+        # UPDATE only apply while the post exists and is unlocked, so they are
+        # safe to send without checking the post first.
+        # D1 doesn't handle None well, so optional values are bound as 0 / ""
+        # and NULLIF turns them back into NULL.
+        writes = [
+            env.DB.prepare(
+                """INSERT INTO forum_comments (post_id, user_id, parent_comment_id, body, images)
+                   SELECT ?, ?, NULLIF(?, 0), ?, NULLIF(?, '')
+                   FROM forum_posts WHERE id = ? AND COALESCE(is_locked, 0) = 0
+                   RETURNING id, created_at"""
+            ).bind(post_id, user_id, body.parent_comment_id or 0, body.body, images_json, post_id),
+            env.DB.prepare(
+                """UPDATE forum_posts SET comment_count = comment_count + 1
+                   WHERE id = ? AND COALESCE(is_locked, 0) = 0"""
+            ).bind(post_id),
+            env.DB.prepare(
+                "SELECT id, name, picture FROM users WHERE id = ?"
+            ).bind(user_id)
+        ]
 
-        # If replying to a comment, check depth
         depth = 0
         if body.parent_comment_id:
-            parent = await env.DB.prepare(
-                "SELECT id, parent_comment_id FROM forum_comments WHERE id = ? AND post_id = ?"
-            ).bind(body.parent_comment_id, post_id).first()
-
-            if parent and hasattr(parent, 'to_py'):
-                parent = parent.to_py()
-
-            if not parent:
+            # Replies: post lookup and the parent's depth first, in one round trip.
+            # The recursive query walks the parent chain; an empty anchor (NULL
+            # depth) means the parent doesn't exist on this post.
+            lookup_results = convert_row(await env.DB.batch(to_js([
+                post_lookup,
+                env.DB.prepare(
+                    """WITH RECURSIVE ancestors(id, parent_comment_id, depth) AS (
+                         SELECT id, parent_comment_id, 0 FROM forum_comments
+                         WHERE id = ? AND post_id = ?
+                         UNION ALL
+                         SELECT c.id, c.parent_comment_id, a.depth + 1
+                         FROM forum_comments c
+                         JOIN ancestors a ON c.id = a.parent_comment_id
+                         WHERE a.depth < ?
+                       )
+                       SELECT MAX(depth) AS depth FROM ancestors"""
+                ).bind(body.parent_comment_id, post_id, MAX_DEPTH)
+            ])))
+
+            post = first_result(lookup_results[0])
+            check_post_open(post)
+
+            parent = first_result(lookup_results[1])
+            parent_depth = safe_value(parent.get("depth")) if parent else None
+            if parent_depth is None:
                 raise HTTPException(status_code=404, detail="Parent comment not found")
 
-            # Calculate depth by traversing up
-            current_id = body.parent_comment_id
-            while current_id:
-                depth += 1
-                if depth >= MAX_DEPTH:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Maximum comment depth of {MAX_DEPTH} reached"
-                    )
-
-                parent_check = await env.DB.prepare(
-                    "SELECT parent_comment_id FROM forum_comments WHERE id = ?"
-                ).bind(current_id).first()
-
-                if parent_check and hasattr(parent_check, 'to_py'):
-                    parent_check = parent_check.to_py()
-
-                current_id = parent_check.get("parent_comment_id") if parent_check else None
-
-        # Serialize images to JSON
-        images_json = json.dumps(body.images) if body.images else None
+            depth = parent_depth + 1
+            if depth >= MAX_DEPTH:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Maximum comment depth of {MAX_DEPTH} reached"
+                )
 
-        # Insert comment - D1 doesn't handle None well, use separate queries
-        if body.parent_comment_id and images_json:
-            result = await env.DB.prepare(
-                """INSERT INTO forum_comments (post_id, user_id, parent_comment_id, body, images)
-                   VALUES (?, ?, ?, ?, ?)
-                   RETURNING id, created_at"""
-            ).bind(post_id, user_id, body.parent_comment_id, body.body, images_json).first()
-        elif body.parent_comment_id:
-            result = await env.DB.prepare(
-                """INSERT INTO forum_comments (post_id, user_id, parent_comment_id, body)
-                   VALUES (?, ?, ?, ?)
-                   RETURNING id, created_at"""
-            ).bind(post_id, user_id, body.parent_comment_id, body.body).first()
-        elif images_json:
-            result = await env.DB.prepare(
-                """INSERT INTO forum_comments (post_id, user_id, body, images)
-                   VALUES (?, ?, ?, ?)
-                   RETURNING id, created_at"""
-            ).bind(post_id, user_id, body.body, images_json).first()
+            write_results = convert_row(await env.DB.batch(to_js(writes)))
         else:
-            result = await env.DB.prepare(
-                """INSERT INTO forum_comments (post_id, user_id, body)
-                   VALUES (?, ?, ?)
-                   RETURNING id, created_at"""
-            ).bind(post_id, user_id, body.body).first()
-
-        if hasattr(result, 'to_py'):
-            result = result.to_py()
-
-        # Update post comment count
-        await env.DB.prepare(
-            "UPDATE forum_posts SET comment_count = comment_count + 1 WHERE id = ?"
-        ).bind(post_id).run()
-
-        # Get author info
-        author = await env.DB.prepare(
-            "SELECT id, name, picture FROM users WHERE id = ?"
-        ).bind(user_id).first()
-
-        if author and hasattr(author, 'to_py'):
-            author = author.to_py()
+            # Top-level comments have nothing to validate up front - look the
+            # post up in the same round trip as the guarded writes
+            write_results = convert_row(await env.DB.batch(to_js([post_lookup, *writes])))
+            post = first_result(write_results.pop(0))
+            check_post_open(post)
+
+        result = first_result(write_results[0])
+        if not result:
+            # Post was locked or deleted after the reply checks above
+            raise HTTPException(status_code=403, detail="Post is locked for comments")
+        author = first_result(write_results[2])
 
-        # Send email notification to post author (if not commenting on own post)
+        # Email the post author (if not commenting on own post) after the
+        # response is sent, so the request doesn't wait on the email API
         post_author_id = safe_value(post.get("user_id"))
         if post_author_id and post_author_id != user_id:
-            try:
-                commenter_name = safe_value(author.get("name")) if author else "Someone"
-                post_title = safe_value(post.get("title")) or "a post"
-                await send_forum_reply_notification(
-                    env,
-                    post_author_id,
-                    commenter_name,
-                    post_title,
-                    body.body
-                )
-            except Exception:
-                pass  # Don't fail the request if email fails
-
-        return CommentResponse(
-            id=result["id"],
-            post_id=post_id,
-            user_id=user_id,
-            author=CommentAuthor(
-                id=user_id,
-                name=author.get("name") if author else None,
-                picture=author.get("picture") if author else None
-            ),
-            parent_comment_id=body.parent_comment_id,
-            body=body.body,
-            images=body.images,
-            upvote_count=0,
-            downvote_count=0,
-            user_vote=None,
-            depth=depth,
-            replies=[],
-            created_at=str(result["created_at"])
-        )
+            commenter_name = safe_value(author.get("name")) if author else "Someone"
+            post_title = safe_value(post.get("title")) or "a post"
+            background_tasks.add_task(
+                send_forum_reply_notification,
+                env,
+                post_author_id,
+                commenter_name,
+                post_title,
+                body.body
+            )
+
+        # Validated request body plus our own row - no need for a model round trip
+        return JSONResponse({
+            "id": result["id"],
+            "post_id": post_id,
+            "user_id": user_id,
+            "author": {
+                "id": user_id,
+                "name": author.get("name") if author else None,
+                "picture": author.get("picture") if author else None
+            },
+            "parent_comment_id": body.parent_comment_id,
+            "body": body.body,
+            "images": body.images,
+            "upvote_count": 0,
+            "downvote_count": 0,
+            "user_vote": None,
+            "depth": depth,
+            "replies": [],
+            "created_at": str(result["created_at"])
+        })
 
     except HTTPException:
         raise
@@ -325,28 +327,29 @@ async def create_comment(
         raise HTTPException(status_code=500, detail=f"Error creating comment: {str(e)}")
 
 
-@router.put("/comments/{comment_id}")
+@router.put("/comments/{comment_id}", response_model=CommentResponse)
 async def update_comment(
     request: Request,
     comment_id: int,
     body: UpdateCommentRequest,
     user_id: int = Depends(require_auth)
-) -> CommentResponse:
+) -> JSONResponse:
     """Update a comment (own comments only)."""
     env = request.scope["env"]
 
     try:
-        # Check ownership
+        # Check ownership - the author's profile comes along in the same query
         existing = await env.DB.prepare(
             """SELECT c.id, c.post_id, c.user_id, c.parent_comment_id, c.upvote_count,
-                      c.downvote_count, c.created_at, p.is_locked
+                      c.downvote_count, c.created_at, p.is_locked,
+                      u.name as author_name, u.picture as author_picture
                FROM forum_comments c
                JOIN forum_posts p ON c.post_id = p.id
+               LEFT JOIN users u ON c.user_id = u.id
                WHERE c.id = ?"""
         ).bind(comment_id).first()
 
-        if existing and hasattr(existing, 'to_py'):
-            existing = existing.to_py()
+        existing = convert_row(existing)
 
         if not existing:
             raise HTTPException(status_code=404, detail="Comment not found")
@@ -362,32 +365,25 @@ async def update_comment(
             "UPDATE forum_comments SET body = ? WHERE id = ?"
         ).bind(body.body, comment_id).run()
 
-        # Get author info
-        author = await env.DB.prepare(
-            "SELECT id, name, picture FROM users WHERE id = ?"
-        ).bind(user_id).first()
-
-        if author and hasattr(author, 'to_py'):
-            author = author.to_py()
-
-        return CommentResponse(
-            id=comment_id,
-            post_id=existing["post_id"],
-            user_id=user_id,
-            author=CommentAuthor(
-                id=user_id,
-                name=author.get("name") if author else None,
-                picture=author.get("picture") if author else None
-            ),
-            parent_comment_id=existing.get("parent_comment_id"),
-            body=body.body,
-            upvote_count=existing.get("upvote_count", 0),
-            downvote_count=existing.get("downvote_count", 0),
-            user_vote=None,
-            depth=0,
-            replies=[],
-            created_at=str(existing["created_at"])
-        )
+        return JSONResponse({
+            "id": comment_id,
+            "post_id": existing["post_id"],
+            "user_id": user_id,
+            "author": {
+                "id": user_id,
+                "name": safe_value(existing.get("author_name")),
+                "picture": safe_value(existing.get("author_picture"))
+            },
+            "parent_comment_id": safe_value(existing.get("parent_comment_id")),
+            "body": body.body,
+            "images": [],
+            "upvote_count": safe_value(existing.get("upvote_count"), 0),
+            "downvote_count": safe_value(existing.get("downvote_count"), 0),
+            "user_vote": None,
+            "depth": 0,
+            "replies": [],
+            "created_at": str(existing["created_at"])
+        })
 
     except HTTPException:
         raise
@@ -405,44 +401,47 @@ async def delete_comment(
     env = request.scope["env"]
 
     try:
-        # Check ownership and get post_id
-        existing = await env.DB.prepare(
-            "SELECT id, post_id, user_id FROM forum_comments WHERE id = ?"
-        ).bind(comment_id).first()
-
-        if existing and hasattr(existing, 'to_py'):
-            existing = existing.to_py()
-
-        if not existing:
-            raise HTTPException(status_code=404, detail="Comment not found")
-
-        if existing["user_id"] != user_id:
-            raise HTTPException(status_code=403, detail="Not your comment")
-
-        # Delete comment and all descendants atomically using CTE with RETURNING
-        # This eliminates the race condition between counting and deleting
-        delete_result = await env.DB.prepare(
+        # Decrement the post's comment count and delete the comment with all its
+        # descendants in one atomic batch. Both statements are anchored on the
+        # comment *and* its owner, so they do nothing unless the user owns it.
+        # The count is taken from the same tree right before it is deleted.
+        update_stmt = env.DB.prepare(
             """WITH RECURSIVE descendants AS (
-                 SELECT id FROM forum_comments WHERE id = ?
+                 SELECT id FROM forum_comments WHERE id = ? AND user_id = ?
+                 UNION ALL
+                 SELECT c.id FROM forum_comments c
+                 JOIN descendants d ON c.parent_comment_id = d.id
+               )
+               UPDATE forum_posts
+               SET comment_count = MAX(0, comment_count - (SELECT COUNT(*) FROM descendants))
+               WHERE id = (SELECT post_id FROM forum_comments WHERE id = ? AND user_id = ?)"""
+        ).bind(comment_id, user_id, comment_id, user_id)
+        delete_stmt = env.DB.prepare(
+            """WITH RECURSIVE descendants AS (
+                 SELECT id FROM forum_comments WHERE id = ? AND user_id = ?
                  UNION ALL
                  SELECT c.id FROM forum_comments c
                  JOIN descendants d ON c.parent_comment_id = d.id
                )
                DELETE FROM forum_comments WHERE id IN (SELECT id FROM descendants)
                RETURNING id"""
-        ).bind(comment_id).all()
+        ).bind(comment_id, user_id)
 
-        if delete_result and hasattr(delete_result, 'to_py'):
-            delete_result = delete_result.to_py()
+        batch_results = await env.DB.batch(to_js([update_stmt, delete_stmt]))
+        batch_results = convert_row(batch_results)
 
         # Count actual deleted rows from RETURNING clause
-        deleted_rows = delete_result.get("results", []) if delete_result else []
-        delete_count = len(deleted_rows)
+        delete_count = len(batch_results[1].get("results", []))
 
-        # Update post comment count
-        await env.DB.prepare(
-            "UPDATE forum_posts SET comment_count = MAX(0, comment_count - ?) WHERE id = ?"
-        ).bind(delete_count, existing["post_id"]).run()
+        if not delete_count:
+            # Nothing deleted - find out whether the comment is missing or not ours
+            existing = await env.DB.prepare(
+                "SELECT id FROM forum_comments WHERE id = ?"
+            ).bind(comment_id).first()
+
+            if not existing:
+                raise HTTPException(status_code=404, detail="Comment not found")
+            raise HTTPException(status_code=403, detail="Not your comment")
 
         return {"success": True, "message": "Comment deleted", "deleted_count": delete_count}
 
@@ -9,10 +9,13 @@ Flow for client-side Discogs (Worker blocked by Cloudflare):
 """
 
 from fastapi import APIRouter, Request, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
+import functools
 import hashlib
 import json
 import base64
+import time
 import urllib.parse
 import js
 from pyodide.ffi import to_js
@@ -20,6 +23,13 @@ from pyodide.ffi import to_js
 router = APIRouter()
 
 DISCOGS_API = "https://api.discogs.com"
+IMAGE_EXTENSIONS = frozenset({"jpg", "jpeg", "png", "gif", "webp"})
+
+# Recently read/written album data, kept per isolate in front of R2
+MEMORY_CACHE_TTL = 60  # seconds
+MEMORY_CACHE_SIZE = 4096
+
+_memory_cache: dict[str, tuple[float, dict]] = {}
 
 
 class AlbumSearchResult(BaseModel):
@@ -66,22 +76,46 @@ class PriceResult(BaseModel):
     price: float | None = None
 
 
+@functools.lru_cache(maxsize=1)
+def discogs_fetch_options():
+    """JS fetch options for Discogs API requests, built once per isolate"""
+    # fromEntries turns nested dicts into plain JS objects in a single to_js call
+    return to_js({
+        "headers": {"User-Agent": "NicheCollectorConnector/1.0 +https://niche-collector.pages.dev"}
+    }, dict_converter=js.Object.fromEntries)
+
+
+@functools.lru_cache(maxsize=8192)
 def get_cache_key(artist: str, album: str) -> str:
     """Generate a consistent cache key for an album"""
     key = f"{artist.lower().strip()}_{album.lower().strip()}"
-    return hashlib.md5(key.encode()).hexdigest()
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+def remember_cached_data(cache_key: str, data: dict) -> None:
+    """Keep album data in the in-process cache, dropping the oldest entry when full"""
+    _memory_cache.pop(cache_key, None)
+    if len(_memory_cache) >= MEMORY_CACHE_SIZE:
+        _memory_cache.pop(next(iter(_memory_cache)))
+    _memory_cache[cache_key] = (time.monotonic(), dict(data))
 
 
 async def get_cached_data(env, cache_key: str) -> dict | None:
-    """Get cached album data from R2 if it exists"""
-    # Check if R2 is available
-    if not hasattr(env, 'CACHE') or env.CACHE is None:
+    """Get cached album data from memory or R2 if it exists"""
+    entry = _memory_cache.get(cache_key)
+    if entry and time.monotonic() - entry[0] < MEMORY_CACHE_TTL:
+        return dict(entry[1])
+
+    # Check if R2 is available (one lookup on the env proxy)
+    cache = getattr(env, 'CACHE', None)
+    if cache is None:
         return None
     try:
-        obj = await env.CACHE.get(f"data/{cache_key}.json")
+        obj = await cache.get(f"data/{cache_key}.json")
         if obj:
-            text = await obj.text()
-            return json.loads(text)
+            data = json.loads(await obj.text())
+            remember_cached_data(cache_key, data)
+            return data
     except Exception as e:
         print(f"[Discogs] Cache read error for {cache_key}: {type(e).__name__}: {e}")
     return None
@@ -89,15 +123,18 @@ async def get_cached_data(env, cache_key: str) -> dict | None:
 
 async def save_cached_data(env, cache_key: str, data: dict) -> None:
     """Save album data to R2 cache"""
+    _memory_cache.pop(cache_key, None)
     # Check if R2 is available
-    if not hasattr(env, 'CACHE') or env.CACHE is None:
+    cache = getattr(env, 'CACHE', None)
+    if cache is None:
         return
     try:
-        await env.CACHE.put(
+        await cache.put(
             f"data/{cache_key}.json",
-            json.dumps(data),
+            json.dumps(data, separators=(",", ":")),
             httpMetadata={"contentType": "application/json"}
         )
+        remember_cached_data(cache_key, data)
     except Exception as e:
         print(f"[Discogs] Cache write error for {cache_key}: {type(e).__name__}: {e}")
 
@@ -133,8 +170,9 @@ async def search_album(
         cached_data = await get_cached_data(env, cache_key)
         if cached_data:
             # Set cached flag to True (overwrite the False that was saved)
+            # Entries are AlbumSearchResult dumps, so skip re-validating them
             cached_data['cached'] = True
-            return AlbumSearchResult(**cached_data)
+            return JSONResponse(cached_data)
 
     # Search Discogs using js.fetch (bypasses Cloudflare blocking)
     try:
@@ -154,20 +192,14 @@ async def search_album(
             print(f"[Discogs] Missing credentials - key: {bool(discogs_key)}, secret: {bool(discogs_secret)}")
             raise HTTPException(status_code=500, detail="Discogs credentials not configured")
 
-        query = f"{artist} {album}"
-        encoded_query = urllib.parse.quote(query, safe='')
-        url = f"{DISCOGS_API}/database/search?q={encoded_query}&type=release&key={discogs_key}&secret={discogs_secret}"
-
-        print(f"[Discogs] Searching: {artist} - {album}")
-        print(f"[Discogs] URL: {DISCOGS_API}/database/search?q={encoded_query}&type=release")
-
-        headers = to_js({
-            "User-Agent": "NicheCollectorConnector/1.0 +https://niche-collector.pages.dev"
+        url = f"{DISCOGS_API}/database/search?" + urllib.parse.urlencode({
+            "q": f"{artist} {album}",
+            "type": "release",
+            "key": discogs_key,
+            "secret": discogs_secret
         })
 
-        print(f"[Discogs] Making API request...")
-        response = await js.fetch(url, to_js({"headers": headers}))
-        print(f"[Discogs] Response status: {response.status}")
+        response = await js.fetch(url, discogs_fetch_options())
 
         if response.status != 200:
             text = await response.text()
@@ -177,49 +209,35 @@ async def search_album(
                 detail=f"Discogs API error: {response.status} - {text[:200]}"
             )
 
-        # Parse JSON response
-        print(f"[Discogs] Parsing JSON response...")
-        json_data = await response.json()
-
-        # Handle both JsProxy and dict cases
-        if hasattr(json_data, 'to_py'):
-            print(f"[Discogs] Converting JsProxy to Python dict...")
-            data = json_data.to_py()
-        else:
-            print(f"[Discogs] Response is already a dict or dict-like...")
-            data = dict(json_data) if json_data else {}
-
-        print(f"[Discogs] Data type: {type(data)}, keys: {list(data.keys()) if isinstance(data, dict) else 'N/A'}")
+        # Parse the body in Python rather than converting a JS object tree with to_py()
+        data = json.loads(await response.text())
 
         results = data.get("results", [])
-        print(f"[Discogs] Found {len(results)} results")
 
         if not results:
             raise HTTPException(status_code=404, detail="Album not found on Discogs")
 
-        # Find best match
+        # Find best match: first title containing both artist and album
         best_match = None
-        artist_lower = artist.lower()
-        album_lower = album.lower()
+        artist_lc = artist.lower()
+        album_lc = album.lower()
 
         for r in results:
-            title_lower = r.get("title", "").lower()
-            if artist_lower in title_lower and album_lower in title_lower:
+            title = (r.get("title") or "").lower()
+            if artist_lc in title and album_lc in title:
                 best_match = r
                 break
 
         if not best_match:
             best_match = results[0]
 
-        print(f"[Discogs] Best match: {best_match.get('title', 'Unknown')}")
+        print(f"[Discogs] Searched {artist} - {album}: {len(results)} results, best match: {best_match.get('title', 'Unknown')}")
 
         # Get cover image
         cover_url = best_match.get("cover_image") or best_match.get("thumb")
-        print(f"[Discogs] Cover URL: {cover_url[:100] if cover_url else 'None'}...")
 
         try:
             local_cover = await cache_image(env, cover_url, cache_key)
-            print(f"[Discogs] Local cover: {local_cover[:100] if local_cover else 'None'}...")
         except Exception as img_err:
             print(f"[Discogs] Error caching image: {type(img_err).__name__}: {str(img_err)}")
             local_cover = cover_url  # Fall back to original URL
@@ -240,7 +258,6 @@ async def search_album(
         # Cache the result
         try:
             await save_cached_data(env, cache_key, result.model_dump())
-            print(f"[Discogs] Result cached successfully")
         except Exception as cache_err:
             print(f"[Discogs] Error caching result (non-fatal): {str(cache_err)}")
 
@@ -273,27 +290,26 @@ async def get_price(request: Request, release_id: int) -> PriceResult:
         return PriceResult(price=None)
 
     try:
-        headers = to_js({
-            "User-Agent": "NicheCollectorConnector/1.0 +https://niche-collector.pages.dev"
-        })
+        auth = urllib.parse.urlencode({"key": discogs_key, "secret": discogs_secret})
+        suggestions_url = f"{DISCOGS_API}/marketplace/price_suggestions/{release_id}?{auth}"
+        release_url = f"{DISCOGS_API}/releases/{release_id}?{auth}"
+        options = discogs_fetch_options()
 
         # Try price suggestions first
-        url = f"{DISCOGS_API}/marketplace/price_suggestions/{release_id}?key={discogs_key}&secret={discogs_secret}"
-        response = await js.fetch(url, to_js({"headers": headers}))
+        response = await js.fetch(suggestions_url, options)
 
         if response.status == 200:
-            data = (await response.json()).to_py()
+            data = json.loads(await response.text())
             if data.get("Very Good Plus (VG+)"):
                 return PriceResult(price=data["Very Good Plus (VG+)"]["value"])
             elif data.get("Very Good (VG)"):
                 return PriceResult(price=data["Very Good (VG)"]["value"])
 
         # Fallback: get lowest price from release
-        url = f"{DISCOGS_API}/releases/{release_id}?key={discogs_key}&secret={discogs_secret}"
-        response = await js.fetch(url, to_js({"headers": headers}))
+        response = await js.fetch(release_url, options)
 
         if response.status == 200:
-            data = (await response.json()).to_py()
+            data = json.loads(await response.text())
             return PriceResult(price=data.get("lowest_price"))
 
         return PriceResult(price=None)
@@ -324,12 +340,13 @@ async def check_cache(
 
     if cached_data:
         # Update cached flag before creating response
+        # Entries are AlbumSearchResult dumps, so skip re-validating them
         cached_data["cached"] = True
-        return CacheCheckResponse(
-            cached=True,
-            cache_key=cache_key,
-            data=AlbumSearchResult(**cached_data)
-        )
+        return JSONResponse({
+            "cached": True,
+            "cache_key": cache_key,
+            "data": cached_data
+        })
 
     return CacheCheckResponse(
         cached=False,
@@ -359,23 +376,24 @@ async def store_cache(
     cover_path = None
 
     # Store image if provided
-    if body.image_data and hasattr(env, 'CACHE') and env.CACHE is not None:
+    cache = getattr(env, 'CACHE', None)
+    if body.image_data and cache is not None:
         try:
             # Decode base64 image
             image_bytes = base64.b64decode(body.image_data)
 
             # Determine path and content type
             ext = body.image_type.lower()
-            if ext not in ["jpg", "jpeg", "png", "gif", "webp"]:
+            if ext not in IMAGE_EXTENSIONS:
                 ext = "jpg"
 
             local_path = f"images/{cache_key}.{ext}"
             content_type = f"image/{ext}" if ext != "jpg" else "image/jpeg"
 
-            # Store in R2
-            await env.CACHE.put(
+            # Store in R2 - to_js copies the buffer into a Uint8Array in one memcpy
+            await cache.put(
                 local_path,
-                image_bytes,
+                to_js(memoryview(image_bytes)),
                 httpMetadata={"contentType": content_type}
             )
 
@@ -396,9 +414,19 @@ async def store_cache(
         cached=False  # Will be True when retrieved
     )
 
+    data = album_data.model_dump()
+
+    # Re-submitting an unchanged album (and no new image) needs no R2 write
+    if not body.image_data and await get_cached_data(env, cache_key) == data:
+        return CacheStoreResponse(
+            success=True,
+            cache_key=cache_key,
+            cover_path=cover_path
+        )
+
     # Store in cache
     try:
-        await save_cached_data(env, cache_key, album_data.model_dump())
+        await save_cached_data(env, cache_key, data)
 
         return CacheStoreResponse(
             success=True,
@@ -409,6 +437,19 @@ async def store_cache(
         raise HTTPException(status_code=500, detail=f"Failed to store cache: {str(e)}")
 
 
+async def iter_r2_body(obj):
+    """
+    Yield an R2 object's body chunk by chunk from its ReadableStream,
+    so the whole image is never held in Python memory at once.
+    """
+    reader = obj.body.getReader()
+    while True:
+        chunk = await reader.read()
+        if chunk.done:
+            break
+        yield chunk.value.to_bytes()
+
+
 @router.get("/cache/{path:path}")
 async def serve_cached_image(request: Request, path: str):
     """Serve cached images from R2"""
@@ -417,11 +458,9 @@ async def serve_cached_image(request: Request, path: str):
     try:
         obj = await env.CACHE.get(path)
         if obj:
-            # Return the object with appropriate headers
-            from starlette.responses import Response
-            body = await obj.arrayBuffer()
+            # Stream the object with appropriate headers
             content_type = obj.httpMetadata.get("contentType", "application/octet-stream")
-            return Response(content=bytes(body), media_type=content_type)
+            return StreamingResponse(iter_r2_body(obj), media_type=content_type)
     except Exception as e:
         print(f"[Discogs] Error serving cached image {path}: {type(e).__name__}: {e}")
 
@@ -8,7 +8,6 @@ from pydantic import BaseModel, Field
 from typing import Optional
 
 from routes.auth import require_auth, require_auth
-from routes.blocks import is_blocked
 from utils.conversions import to_python_value
 from services.email import send_friend_request_notification, send_friend_accepted_notification
 
@@ -131,10 +130,25 @@ async def send_friend_request(
         if not body.name or not body.name.strip():
             raise HTTPException(status_code=400, detail="Name is required")
 
-        # Find user by exact name (case-sensitive)
+        # Target (by exact, case-sensitive name), sender, friendship, block and any
+        # existing request in either direction - one round trip
         target = await env.DB.prepare(
-            "SELECT id, name, picture FROM users WHERE name = ?"
-        ).bind(body.name.strip()).first()
+            """SELECT t.id, t.name, t.picture,
+                      s.id AS sender_id, s.name AS sender_name, s.picture AS sender_picture,
+                      EXISTS(SELECT 1 FROM friends WHERE user_id = ? AND friend_id = t.id) AS is_friend,
+                      EXISTS(SELECT 1 FROM blocked_users
+                             WHERE (blocker_id = ? AND blocked_id = t.id)
+                                OR (blocker_id = t.id AND blocked_id = ?)) AS is_blocked,
+                      r.id AS request_id, r.sender_id AS request_sender_id,
+                      r.status AS request_status
+               FROM (SELECT id, name, picture FROM users WHERE name = ? LIMIT 1) t
+               LEFT JOIN users s ON s.id = ?
+               LEFT JOIN friend_requests r ON r.id = (
+                   SELECT id FROM friend_requests
+                   WHERE (sender_id = ? AND recipient_id = t.id) OR (sender_id = t.id AND recipient_id = ?)
+                   LIMIT 1
+               )"""
+        ).bind(user_id, user_id, user_id, body.name.strip(), user_id, user_id, user_id).first()
 
         if target and hasattr(target, 'to_py'):
             target = target.to_py()
@@ -143,33 +157,27 @@ async def send_friend_request(
             raise HTTPException(status_code=404, detail="User not found")
 
         target_id = target["id"]
+        sender = {"name": target.get("sender_name"), "picture": target.get("sender_picture")} if target.get("sender_id") else None
 
         # Can't add yourself
         if target_id == user_id:
             raise HTTPException(status_code=400, detail="You cannot send a request to yourself")
 
         # Check if already friends
-        existing_friend = await env.DB.prepare(
-            "SELECT id FROM friends WHERE user_id = ? AND friend_id = ?"
-        ).bind(user_id, target_id).first()
-
-        if existing_friend:
+        if target["is_friend"]:
             raise HTTPException(status_code=400, detail="You are already friends with this user")
 
         # Check if blocked (either direction)
-        if await is_blocked(env, user_id, target_id):
+        if target["is_blocked"]:
             raise HTTPException(status_code=403, detail="Unable to send friend request to this user")
 
         # Check if request already exists (in either direction)
-        existing_request = await env.DB.prepare(
-            """SELECT id, sender_id, status FROM friend_requests
-               WHERE ((sender_id = ? AND recipient_id = ?) OR (sender_id = ? AND recipient_id = ?))"""
-        ).bind(user_id, target_id, target_id, user_id).first()
-
-        if existing_request and hasattr(existing_request, 'to_py'):
-            existing_request = existing_request.to_py()
-
-        if existing_request:
+        if target.get("request_id"):
+            existing_request = {
+                "id": target["request_id"],
+                "sender_id": target["request_sender_id"],
+                "status": target["request_status"]
+            }
             if existing_request["status"] == "pending":
                 if existing_request["sender_id"] == user_id:
                     raise HTTPException(status_code=400, detail="You already sent a request to this user")
@@ -177,19 +185,15 @@ async def send_friend_request(
                     raise HTTPException(status_code=400, detail="This user already sent you a request - check your pending requests!")
             elif existing_request["status"] == "rejected":
                 # Allow re-sending if previous request was rejected - reset to pending
-                await env.DB.prepare(
+                reset = await env.DB.prepare(
                     """UPDATE friend_requests
                        SET status = 'pending', sender_id = ?, recipient_id = ?,
                            created_at = CURRENT_TIMESTAMP, responded_at = NULL
-                       WHERE id = ?"""
-                ).bind(user_id, target_id, existing_request["id"]).run()
+                       WHERE id = ? RETURNING created_at"""
+                ).bind(user_id, target_id, existing_request["id"]).first()
 
-                # Get sender info for response
-                sender = await env.DB.prepare(
-                    "SELECT name, picture FROM users WHERE id = ?"
-                ).bind(user_id).first()
-                if sender and hasattr(sender, 'to_py'):
-                    sender = sender.to_py()
+                if reset and hasattr(reset, 'to_py'):
+                    reset = reset.to_py()
 
                 return FriendRequest(
                     id=existing_request["id"],
@@ -200,18 +204,10 @@ async def send_friend_request(
                     recipient_name=to_python_value(target.get("name")),
                     recipient_picture=to_python_value(target.get("picture")),
                     status="pending",
-                    created_at=str(existing_request.get("created_at", ""))
+                    created_at=str(reset.get("created_at", "")) if reset else ""
                 )
             # If accepted, they're already friends (handled above)
 
-        # Get sender info
-        sender = await env.DB.prepare(
-            "SELECT name, picture FROM users WHERE id = ?"
-        ).bind(user_id).first()
-
-        if sender and hasattr(sender, 'to_py'):
-            sender = sender.to_py()
-
         # Create friend request
         result = await env.DB.prepare(
             """INSERT INTO friend_requests (sender_id, recipient_id, status)
@@ -2,15 +2,17 @@
 # External API integrations for collection enrichment
 
 from .discogs import search_discogs_for_album, Album
-from .pokemon_tcg import search_pokemon_tcg
-from .scryfall import search_scryfall
+from .pokemon_tcg import search_pokemon_tcg, search_pokemon_tcg_bulk
+from .scryfall import search_scryfall, search_scryfall_bulk
 from .rawg import search_rawg
 from .email import send_notification_email, NotificationType
 
 __all__ = [
     "search_discogs_for_album",
     "search_pokemon_tcg",
+    "search_pokemon_tcg_bulk",
     "search_scryfall",
+    "search_scryfall_bulk",
     "search_rawg",
     "send_notification_email",
     "NotificationType",
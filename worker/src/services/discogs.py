@@ -2,7 +2,9 @@
 Discogs API service for vinyl record search and enrichment
 """
 
+import functools
 import js
+import json
 from pyodide.ffi import to_js
 from typing import Optional
 from pydantic import BaseModel
@@ -20,6 +22,15 @@ class Album(BaseModel):
     discogs_id: Optional[int] = None
 
 
+@functools.lru_cache(maxsize=1)
+def discogs_headers(discogs_key: str, discogs_secret: str):
+    """JS headers object for Discogs requests, built once per credential pair"""
+    return to_js({
+        "Authorization": f"Discogs key={discogs_key}, secret={discogs_secret}",
+        "User-Agent": "NicheCollectorConnector/1.0"
+    })
+
+
 async def search_discogs_for_album(
     artist: str,
     album: str,
@@ -35,18 +46,13 @@ async def search_discogs_for_album(
     try:
         url = f"{DISCOGS_API_URL}?q={js.encodeURIComponent(query)}&type=release&per_page=10"
 
-        headers = to_js({
-            "Authorization": f"Discogs key={discogs_key}, secret={discogs_secret}",
-            "User-Agent": "NicheCollectorConnector/1.0"
-        })
-
-        response = await js.fetch(url, to_js({"headers": headers}))
+        response = await js.fetch(url, to_js({"headers": discogs_headers(str(discogs_key), str(discogs_secret))}))
 
         if response.status != 200:
             print(f"[Discogs] Error: {response.status}")
             return Album(artist=artist, album=album)
 
-        data = (await response.json()).to_py()
+        data = json.loads(await response.text())
         results = data.get("results", [])
 
         if not results:
@@ -56,17 +62,19 @@ async def search_discogs_for_album(
         # Score results to find best match
         best_result = None
         best_score = -1
+        artist_lc = artist.lower()
+        album_lc = album.lower()
 
         for result in results:
             score = 0
             title = result.get("title", "").lower()
 
             # Check artist match
-            if artist.lower() in title:
+            if artist_lc in title:
                 score += 10
 
             # Check album match
-            if album.lower() in title:
+            if album_lc in title:
                 score += 10
 
             # Prefer results with cover images
@@ -77,8 +85,8 @@ async def search_discogs_for_album(
             # Prefer vinyl/LP formats
             formats = result.get("format", [])
             if isinstance(formats, list):
-                format_str = " ".join(formats).lower()
-                if "vinyl" in format_str or "lp" in format_str:
+                lowered = (f.lower() for f in formats if isinstance(f, str))
+                if any("vinyl" in f or "lp" in f for f in lowered):
                     score += 3
 
             if score > best_score:
@@ -3,20 +3,27 @@ Pokemon TCG API service for trading card search and enrichment
 API is free, no auth required.
 """
 
+import functools
 import js
+import json
 from pyodide.ffi import to_js
 from urllib.parse import quote_plus
-from typing import Optional
-from pydantic import BaseModel
+from .discogs import Album
 
 
-class Album(BaseModel):
-    """Item in user's collection (using Album for compatibility)"""
-    artist: str
-    album: str
-    cover: Optional[str] = None
-    year: Optional[int] = None
-    discogs_id: Optional[int] = None
+POKEMON_TCG_CARDS_URL = "https://api.pokemontcg.io/v2/cards"
+POKEMON_TCG_BULK_LIMIT = 20  # names OR'ed into one query
+POKEMON_TCG_PAGE_SIZE = 250  # API maximum
+
+
+@functools.lru_cache(maxsize=1)
+def pokemon_tcg_headers():
+    """JS headers object for Pokemon TCG API requests, built once per isolate"""
+    return to_js({
+        "Content-Type": "application/json",
+        "User-Agent": "NicheCollectorConnector/1.0",
+        "Accept": "application/json"
+    })
 
 
 async def search_pokemon_tcg(card_set: str, card_name: str) -> Album:
@@ -30,14 +37,10 @@ async def search_pokemon_tcg(card_set: str, card_name: str) -> Album:
     try:
         # Pokemon TCG API - search by name
         encoded_name = quote_plus(card_name)
-        url = f"https://api.pokemontcg.io/v2/cards?q=name:{encoded_name}&pageSize=10"
+        url = f"{POKEMON_TCG_CARDS_URL}?q=name:{encoded_name}&pageSize=10"
         print(f"[Pokemon TCG] URL: {url}")
 
-        headers = to_js({
-            "Content-Type": "application/json",
-            "User-Agent": "NicheCollectorConnector/1.0",
-            "Accept": "application/json"
-        })
+        headers = pokemon_tcg_headers()
 
         # Add timeout using AbortController
         controller = js.AbortController.new()
@@ -53,59 +56,117 @@ async def search_pokemon_tcg(card_set: str, card_name: str) -> Album:
             print(f"[Pokemon TCG] Error: {response.status}")
             return Album(artist=card_set, album=card_name)
 
-        data = (await response.json()).to_py()
+        data = json.loads(await response.text())
         cards = data.get("data", [])
 
         if not cards:
             print(f"[Pokemon TCG] No results for: {query}")
             return Album(artist=card_set, album=card_name)
 
-        # Find best match - prefer matching set name
-        best_card = None
-        best_score = -1
-
-        for card in cards:
-            score = 0
-            # Check name match
-            if card_name.lower() in card.get("name", "").lower():
-                score += 10
-            # Check set match
-            set_name = card.get("set", {}).get("name", "").lower()
-            if card_set.lower() in set_name:
-                score += 10
-            # Prefer cards with images
-            if card.get("images", {}).get("large"):
-                score += 5
-            # Prefer holos/rare cards
-            if "holo" in card.get("rarity", "").lower():
-                score += 3
-
-            if score > best_score:
-                best_score = score
-                best_card = card
-
+        best_card = best_card_match(cards, card_set, card_name)
         if best_card:
-            images = best_card.get("images", {})
-            cover = images.get("large") or images.get("small")
-            set_info = best_card.get("set", {})
-            year = None
-            if set_info.get("releaseDate"):
-                try:
-                    year = int(set_info["releaseDate"][:4])
-                except (ValueError, TypeError):
-                    pass
-
-            print(f"[Pokemon TCG] Found: {best_card.get('name')} from {set_info.get('name')}")
-
-            return Album(
-                artist=set_info.get("name", card_set),
-                album=best_card.get("name", card_name),
-                cover=cover,
-                year=year
-            )
+            return card_to_album(best_card, card_set, card_name)
 
         return Album(artist=card_set, album=card_name)
 
     except Exception as error:
         print(f"[Pokemon TCG] Error: {error}")
         return Album(artist=card_set, album=card_name)
+
+
+async def search_pokemon_tcg_bulk(cards: list[tuple[str, str]]) -> list[Album | None]:
+    """
+    Look up many Pokemon cards with one OR'ed name query per batch.
+    Returns one entry per (set, name) pair, in order; None where no card matched
+    so callers can fall back to the single-card search.
+    """
+    print(f"[Pokemon TCG] Bulk lookup for {len(cards)} cards")
+    results: list[Album | None] = [None] * len(cards)
+
+    try:
+        headers = pokemon_tcg_headers()
+
+        for start in range(0, len(cards), POKEMON_TCG_BULK_LIMIT):
+            batch = cards[start:start + POKEMON_TCG_BULK_LIMIT]
+            # Names with quotes can't go in a phrase query - they fall back to single search
+            names = " OR ".join(f'name:"{name}"' for _, name in batch if '"' not in name)
+            if not names:
+                continue
+            url = f"{POKEMON_TCG_CARDS_URL}?q={quote_plus(names)}&pageSize={POKEMON_TCG_PAGE_SIZE}"
+
+            controller = js.AbortController.new()
+            timeout_id = js.setTimeout(lambda: controller.abort(), 8000)
+            try:
+                response = await js.fetch(url, to_js({"headers": headers, "signal": controller.signal}))
+            finally:
+                js.clearTimeout(timeout_id)
+
+            if response.status != 200:
+                print(f"[Pokemon TCG] Bulk error: {response.status}")
+                continue
+
+            found = json.loads(await response.text()).get("data", [])
+
+            for offset, (card_set, card_name) in enumerate(batch):
+                name_lc = card_name.lower()
+                candidates = [card for card in found if name_lc in card.get("name", "").lower()]
+                best_card = best_card_match(candidates, card_set, card_name)
+                if best_card:
+                    results[start + offset] = card_to_album(best_card, card_set, card_name)
+
+    except Exception as error:
+        print(f"[Pokemon TCG] Bulk error: {error}")
+
+    return results
+
+
+def best_card_match(cards: list[dict], card_set: str, card_name: str) -> dict | None:
+    """Pick the card that best matches the requested name and set"""
+    best_card = None
+    best_score = -1
+    name_lc = card_name.lower()
+    set_lc = card_set.lower()
+
+    for card in cards:
+        score = 0
+        # Check name match
+        if name_lc in card.get("name", "").lower():
+            score += 10
+        # Check set match
+        set_name = card.get("set", {}).get("name", "").lower()
+        if set_lc in set_name:
+            score += 10
+        # Prefer cards with images
+        if card.get("images", {}).get("large"):
+            score += 5
+        # Prefer holos/rare cards
+        if "holo" in card.get("rarity", "").lower():
+            score += 3
+
+        if score > best_score:
+            best_score = score
+            best_card = card
+
+    return best_card
+
+
+def card_to_album(card: dict, card_set: str, card_name: str) -> Album:
+    """Build an Album from a Pokemon TCG card object"""
+    images = card.get("images", {})
+    cover = images.get("large") or images.get("small")
+    set_info = card.get("set", {})
+    year = None
+    if set_info.get("releaseDate"):
+        try:
+            year = int(set_info["releaseDate"][:4])
+        except (ValueError, TypeError):
+            pass
+
+    print(f"[Pokemon TCG] Found: {card.get('name')} from {set_info.get('name')}")
+
+    return Album(
+        artist=set_info.get("name", card_set),
+        album=card.get("name", card_name),
+        cover=cover,
+        year=year
+    )
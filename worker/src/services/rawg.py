@@ -3,20 +3,18 @@ RAWG.io API service for video game search and enrichment
 Requires API key (free to get at rawg.io/apidocs).
 """
 
+import functools
 import js
+import json
 from pyodide.ffi import to_js
 from urllib.parse import quote_plus
-from typing import Optional
-from pydantic import BaseModel
+from .discogs import Album
 
 
-class Album(BaseModel):
-    """Item in user's collection (using Album for compatibility)"""
-    artist: str
-    album: str
-    cover: Optional[str] = None
-    year: Optional[int] = None
-    discogs_id: Optional[int] = None
+@functools.lru_cache(maxsize=1)
+def rawg_headers():
+    """JS headers object for RAWG requests, built once per isolate"""
+    return to_js({"Content-Type": "application/json"})
 
 
 async def search_rawg(platform: str, game_title: str, api_key: str = "") -> Album:
@@ -38,14 +36,14 @@ async def search_rawg(platform: str, game_title: str, api_key: str = "") -> Albu
         url = f"https://api.rawg.io/api/games?key={api_key}&search={encoded_title}&page_size=10"
 
         response = await js.fetch(url, to_js({
-            "headers": to_js({"Content-Type": "application/json"})
+            "headers": rawg_headers()
         }))
 
         if response.status != 200:
             print(f"[RAWG] Error: {response.status}")
             return Album(artist=platform, album=game_title)
 
-        data = (await response.json()).to_py()
+        data = json.loads(await response.text())
         games = data.get("results", [])
 
         if not games:
@@ -3,20 +3,27 @@ Scryfall API service for Magic: The Gathering card search and enrichment
 API is free, no auth required.
 """
 
+import functools
 import js
 from pyodide.ffi import to_js
 from urllib.parse import quote_plus
-from typing import Optional
-from pydantic import BaseModel
+import json
+from .discogs import Album
 
 
-class Album(BaseModel):
-    """Item in user's collection (using Album for compatibility)"""
-    artist: str
-    album: str
-    cover: Optional[str] = None
-    year: Optional[int] = None
-    discogs_id: Optional[int] = None
+SCRYFALL_COLLECTION_URL = "https://api.scryfall.com/cards/collection"
+SCRYFALL_COLLECTION_LIMIT = 75  # max identifiers per collection request
+
+
+@functools.lru_cache(maxsize=1)
+def scryfall_headers():
+    """JS headers object for Scryfall requests, built once per isolate"""
+    # Scryfall requires a User-Agent that identifies the app
+    return to_js({
+        "Content-Type": "application/json",
+        "User-Agent": "NicheCollectorConnector/1.0",
+        "Accept": "application/json"
+    })
 
 
 async def search_scryfall(card_set: str, card_name: str) -> Album:
@@ -33,12 +40,7 @@ async def search_scryfall(card_set: str, card_name: str) -> Album:
         url = f"https://api.scryfall.com/cards/named?fuzzy={encoded_name}"
         print(f"[Scryfall] URL: {url}")
 
-        # Scryfall requires a User-Agent that identifies the app
-        headers = to_js({
-            "Content-Type": "application/json",
-            "User-Agent": "NicheCollectorConnector/1.0",
-            "Accept": "application/json"
-        })
+        headers = scryfall_headers()
 
         response = await js.fetch(url, to_js({"headers": headers}))
 
@@ -55,7 +57,7 @@ async def search_scryfall(card_set: str, card_name: str) -> Album:
             print(f"[Scryfall] Error: {response.status}")
             return Album(artist=card_set, album=card_name)
 
-        data = (await response.json()).to_py()
+        data = json.loads(await response.text())
         print(f"[Scryfall] Got data keys: {list(data.keys()) if isinstance(data, dict) else 'not a dict'}")
 
         # Handle search results vs single card
@@ -71,34 +73,82 @@ async def search_scryfall(card_set: str, card_name: str) -> Album:
 
         print(f"[Scryfall] Card keys: {list(card.keys()) if isinstance(card, dict) else 'not a dict'}")
 
-        # Get best image
-        images = card.get("image_uris", {})
-        print(f"[Scryfall] Image URIs: {images}")
-        cover = images.get("large") or images.get("normal") or images.get("small")
-
-        # If double-faced card, get front face
-        if not cover and card.get("card_faces"):
-            print(f"[Scryfall] Checking card_faces for images")
-            face_images = card["card_faces"][0].get("image_uris", {})
-            cover = face_images.get("large") or face_images.get("normal")
-
-        year = None
-        if card.get("released_at"):
-            try:
-                year = int(card["released_at"][:4])
-            except (ValueError, TypeError):
-                pass
-
-        set_name = card.get("set_name", card_set)
-        print(f"[Scryfall] Found: {card.get('name')} from {set_name}, cover: {cover[:50] if cover else 'None'}...")
-
-        return Album(
-            artist=set_name,
-            album=card.get("name", card_name),
-            cover=cover,
-            year=year
-        )
+        return card_to_album(card, card_set, card_name)
 
     except Exception as error:
         print(f"[Scryfall] Error: {error}")
         return Album(artist=card_set, album=card_name)
+
+
+async def search_scryfall_bulk(cards: list[tuple[str, str]]) -> list[Album | None]:
+    """
+    Look up many MTG cards by exact name with Scryfall's collection endpoint.
+    Returns one entry per (set, name) pair, in order; None where no card matched
+    so callers can fall back to the fuzzy single-card search.
+    """
+    print(f"[Scryfall] Bulk lookup for {len(cards)} cards")
+    results: list[Album | None] = [None] * len(cards)
+
+    try:
+        headers = scryfall_headers()
+
+        for start in range(0, len(cards), SCRYFALL_COLLECTION_LIMIT):
+            batch = cards[start:start + SCRYFALL_COLLECTION_LIMIT]
+            response = await js.fetch(SCRYFALL_COLLECTION_URL, to_js({
+                "method": "POST",
+                "headers": headers,
+                "body": json.dumps({"identifiers": [{"name": name} for _, name in batch]})
+            }, dict_converter=js.Object.fromEntries))
+
+            if response.status != 200:
+                print(f"[Scryfall] Bulk error: {response.status}")
+                continue
+
+            data = json.loads(await response.text())
+
+            # Found cards come back without their request index - match by name
+            # (double-faced cards are named "Front // Back")
+            by_name = {}
+            for card in data.get("data", []):
+                name = card.get("name", "").lower()
+                by_name.setdefault(name, card)
+                by_name.setdefault(name.split(" // ")[0], card)
+
+            for offset, (card_set, card_name) in enumerate(batch):
+                card = by_name.get(card_name.lower())
+                if card:
+                    results[start + offset] = card_to_album(card, card_set, card_name)
+
+    except Exception as error:
+        print(f"[Scryfall] Bulk error: {error}")
+
+    return results
+
+
+def card_to_album(card: dict, card_set: str, card_name: str) -> Album:
+    """Build an Album from a Scryfall card object"""
+    # Get best image
+    images = card.get("image_uris", {})
+    cover = images.get("large") or images.get("normal") or images.get("small")
+
+    # If double-faced card, get front face
+    if not cover and card.get("card_faces"):
+        face_images = card["card_faces"][0].get("image_uris", {})
+        cover = face_images.get("large") or face_images.get("normal")
+
+    year = None
+    if card.get("released_at"):
+        try:
+            year = int(card["released_at"][:4])
+        except (ValueError, TypeError):
+            pass
+
+    set_name = card.get("set_name", card_set)
+    print(f"[Scryfall] Found: {card.get('name')} from {set_name}, cover: {cover[:50] if cover else 'None'}...")
+
+    return Album(
+        artist=set_name,
+        album=card.get("name", card_name),
+        cover=cover,
+        year=year
+    )
@@ -4,6 +4,25 @@ Handles JsProxy, JsNull, and other JavaScript-Python type conversions
 """
 
 
+# How values of each type convert, worked out once per type: "null", "proxy" or "plain"
+_type_kinds: dict[type, str] = {}
+
+
+def _type_kind(value_type: type) -> str:
+    kind = _type_kinds.get(value_type)
+    if kind is None:
+        # Check for JS null/undefined types by checking the type name
+        type_name = str(value_type)
+        if 'JsNull' in type_name or 'JsUndefined' in type_name:
+            kind = "null"
+        elif 'JsProxy' in type_name:
+            kind = "proxy"
+        else:
+            kind = "plain"
+        _type_kinds[value_type] = kind
+    return kind
+
+
 def to_python_value(value, default=None):
     """
     Convert JavaScript types (JsNull, JsUndefined, JsProxy) to Python equivalents.
@@ -18,13 +37,12 @@ def to_python_value(value, default=None):
     if value is None:
         return default
 
-    # Check for JS null/undefined types by checking the type name
-    type_name = str(type(value))
-    if 'JsNull' in type_name or 'JsUndefined' in type_name:
+    kind = _type_kind(type(value))
+    if kind == "null":
         return default
 
     # Check for JsProxy and convert if needed
-    if 'JsProxy' in type_name and hasattr(value, 'to_py'):
+    if kind == "proxy" and hasattr(value, 'to_py'):
         return value.to_py()
 
     return value
@@ -40,11 +58,9 @@ def convert_row(row):
     Returns:
         Python dict
     """
-    if row is None:
-        return None
-    if hasattr(row, 'to_py'):
-        return row.to_py()
-    return row
+    # One attribute lookup instead of hasattr() + attribute access
+    to_py = getattr(row, 'to_py', None)
+    return to_py() if to_py is not None else row
 
 
 def convert_rows(results):
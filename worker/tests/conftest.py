@@ -2,6 +2,7 @@
 Pytest configuration and fixtures for NCC API tests
 """
 
+import sqlite3
 import pytest
 from unittest.mock import MagicMock, AsyncMock
 
@@ -37,6 +38,57 @@ def mock_env():
     return env
 
 
+class FakeD1Statement:
+    """Prepared statement with the D1 bind/first/all/run interface"""
+
+    def __init__(self, conn, sql, params=()):
+        self.conn = conn
+        self.sql = sql
+        self.params = params
+
+    def bind(self, *params):
+        # D1 rejects None/undefined bind values
+        if any(param is None for param in params):
+            raise TypeError("D1_TYPE_ERROR: Type 'undefined' not supported for value 'undefined'")
+        return FakeD1Statement(self.conn, self.sql, params)
+
+    def execute(self):
+        rows = [dict(row) for row in self.conn.execute(self.sql, self.params).fetchall()]
+        return {"results": rows, "success": True}
+
+    async def first(self):
+        rows = self.execute()["results"]
+        return rows[0] if rows else None
+
+    async def all(self):
+        return self.execute()
+
+    async def run(self):
+        return self.execute()
+
+
+class FakeD1:
+    """SQLite-backed D1 binding"""
+
+    def __init__(self, schema: str):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(schema)
+
+    def prepare(self, sql):
+        return FakeD1Statement(self.conn, sql)
+
+    async def batch(self, statements):
+        with self.conn:
+            return [statement.execute() for statement in statements]
+
+
+@pytest.fixture
+def sqlite_d1():
+    """Factory for an in-memory SQLite stand-in for D1, built from a schema script"""
+    return FakeD1
+
+
 @pytest.fixture
 def mock_request(mock_env):
     """Create a mock FastAPI request with environment"""
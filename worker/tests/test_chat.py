@@ -0,0 +1,218 @@
+"""
+Tests for AI chat response handling
+"""
+
+import asyncio
+import pytest
+
+
+class TestChooseMaxTokens:
+    """Tests for the generation cap chosen from message intent"""
+
+    @pytest.mark.parametrize("category,message", [
+        ("vinyl", "Add Kind of Blue by Miles Davis"),
+        ("trading-cards", "add Base Set Charizard to my collection"),
+        ("cars", "Please add my 1969 Ford Mustang"),
+        ("sneakers", "remove the Jordan 1 Chicago"),
+        ("watches", "showcase my Omega Speedmaster"),
+        ("comics", "put Amazing Spider-Man 300 in my showcase"),
+        ("video-games", "delete Halo 3 from my games"),
+        ("coins", "add a 1909-S VDB Lincoln cent"),
+    ])
+    def test_action_turns_get_full_budget(self, category, message):
+        """Action turns keep room for the reasoning preamble plus trailing tags"""
+        from routes.chat import choose_max_tokens, MAX_TOKENS_DEFAULT
+
+        assert choose_max_tokens(message) == MAX_TOKENS_DEFAULT
+
+    def test_conversational_turn(self):
+        """Questions without action intent get the chat cap"""
+        from routes.chat import choose_max_tokens, MAX_TOKENS_CHAT
+
+        assert choose_max_tokens("What should I listen to next?") == MAX_TOKENS_CHAT
+
+
+class TestCleanResponse:
+    """Tests for cleaning model output for display"""
+
+    def test_tag_led_reply_with_reasoning(self):
+        """A reply that opens with an action tag is truncated at reasoning, not treated as polluted"""
+        from routes.chat import clean_response
+
+        raw = "{{ADD:Miles Davis|Kind of Blue}} Let's think about what else. Added!"
+        assert clean_response(raw, "vinyl") == "Done! Is there anything else you'd like me to help with?"
+
+    def test_action_tags_removed(self):
+        """Action tags are stripped from the displayed text"""
+        from routes.chat import clean_response
+
+        raw = "Added it! {{ADD:Funkadelic|Maggot Brain}} Enjoy."
+        assert clean_response(raw) == "Added it! Enjoy."
+
+    @pytest.mark.parametrize("raw,expected", [
+        ("<think>pick {{ADD:X|Y}}</think>Here you go!", "Here you go!"),
+        ("<THINKING>hmm</THINKING> Hello there!", "Hello there!"),
+        ("<think>a</think>Hi<thinking>b</thinking> there", "Hi there"),
+    ])
+    def test_think_blocks_removed(self, raw, expected):
+        """Closed think/thinking blocks are removed in any case"""
+        from routes.chat import clean_response
+
+        assert clean_response(raw) == expected
+
+    def test_unclosed_think_block_kept(self):
+        """An unclosed think tag is left as-is rather than eating the reply"""
+        from routes.chat import clean_response
+
+        raw = "I think <think>unclosed block stays"
+        assert clean_response(raw) == raw
+
+
+class TestParseActions:
+    """Tests for parsing action tags from model output"""
+
+    def test_all_actions(self):
+        """ADD, REMOVE and SHOWCASE tags are parsed with one or two braces"""
+        from routes.chat import parse_actions
+
+        to_add, to_remove, to_showcase = parse_actions(
+            "{{ADD:Pink Floyd|Animals}} {REMOVE:Yes|Fragile} {{showcase:Genesis|Foxtrot}}"
+        )
+        assert [(a.artist, a.album) for a in to_add] == [("Pink Floyd", "Animals")]
+        assert [(a.artist, a.album) for a in to_remove] == [("Yes", "Fragile")]
+        assert [(a.artist, a.album) for a in to_showcase] == [("Genesis", "Foxtrot")]
+
+    def test_unicode_fields(self):
+        """Non-ASCII artist and album names are kept intact"""
+        from routes.chat import parse_actions
+
+        to_add, _, _ = parse_actions("{{ADD:Sigur Rós|Ágætis byrjun}}")
+        assert to_add[0].artist == "Sigur Rós"
+        assert to_add[0].album == "Ágætis byrjun"
+
+    def test_extra_pipes_stay_in_second_field(self):
+        """Only the first pipe separates the fields"""
+        from routes.chat import parse_actions
+
+        to_add, _, _ = parse_actions("{{ADD:AC|DC|Back in Black}}")
+        assert (to_add[0].artist, to_add[0].album) == ("AC", "DC|Back in Black")
+
+    @pytest.mark.parametrize("raw", [
+        "{{ADD:Pink Floyd}}",
+        "{{ADD:Yes|Fragile",
+        "{{ADD:Artist|Album}}",
+        "{{ADD:X|Y}}",
+    ])
+    def test_malformed_or_placeholder_tags_ignored(self, raw):
+        """Tags without two fields, unclosed, placeholder or too-short fields produce no action"""
+        from routes.chat import parse_actions
+
+        assert parse_actions(raw) == ([], [], [])
+
+    def test_malformed_tag_does_not_swallow_next(self):
+        """A tag missing its pipe doesn't merge with the following tag"""
+        from routes.chat import parse_actions
+
+        to_add, _, _ = parse_actions("{{ADD:x}} {{ADD:Pink Floyd|Animals}}")
+        assert [(a.artist, a.album) for a in to_add] == [("Pink Floyd", "Animals")]
+
+    def test_duplicates_dropped_add_first(self):
+        """Case-insensitive duplicates are dropped, with ADD taking precedence"""
+        from routes.chat import parse_actions
+
+        to_add, to_remove, to_showcase = parse_actions(
+            "{{ADD:Yes|Fragile}} {{ADD:yes|fragile}} {{SHOWCASE:Yes|Fragile}}"
+        )
+        assert len(to_add) == 1
+        assert to_remove == [] and to_showcase == []
+
+
+class TestDetectCardGame:
+    """Tests for trading card game detection"""
+
+    @pytest.mark.parametrize("field1,field2,expected", [
+        ("Base Set", "Charizard", "pokemon"),
+        ("Jungle", "Pikachu", "pokemon"),
+        ("Alpha", "Black Lotus", "mtg"),
+        ("LOB", "Blue-Eyes White Dragon", "yugioh"),
+        ("Topps Chrome", "Mike Trout Rookie", "sports"),
+        ("Unknown", "Shivan Dragon", None),
+        ("Basement", "Setter", None),
+    ])
+    def test_detect(self, field1, field2, expected):
+        """Keywords and phrases match whole words only"""
+        from routes.chat import detect_card_game
+
+        assert detect_card_game(field1, field2) == expected
+
+
+class TestThinkBlockFilter:
+    """Tests for dropping think blocks from streamed deltas"""
+
+    def feed_all(self, deltas):
+        from routes.chat import ThinkBlockFilter
+
+        think_filter = ThinkBlockFilter()
+        return "".join(think_filter.feed(delta) for delta in deltas) + think_filter.flush()
+
+    def test_block_dropped(self):
+        """A complete block within one delta is removed"""
+        assert self.feed_all(["<think>plan</think>Hello"]) == "Hello"
+
+    def test_tags_split_across_deltas(self):
+        """Opening and closing tags split over several deltas are still recognized"""
+        deltas = ["Hi <thi", "nk>secret", " plan</th", "ink> there"]
+        assert self.feed_all(deltas) == "Hi  there"
+
+    def test_case_insensitive(self):
+        """Upper-case THINKING blocks are dropped like the backend cleaner does"""
+        assert self.feed_all(["<THINKING>hmm</THINKING>", "Hello!"]) == "Hello!"
+
+    def test_unclosed_block_hidden(self):
+        """Content of a block that never closes is not streamed"""
+        assert self.feed_all(["Sure. <think>still reasoning", " more"]) == "Sure. "
+
+    def test_other_angle_brackets_kept(self):
+        """Text that only looks like the start of a tag is released"""
+        assert self.feed_all(["a <", "b> c < d"]) == "a <b> c < d"
+
+
+class TestPendingEnrichments:
+    """Tests for batched trading card enrichment"""
+
+    @pytest.mark.asyncio
+    async def test_bulk_lookup_skips_r2_hits(self, mock_env):
+        """Cards cached in R2 are served from it and left out of the bulk request"""
+        import json
+        import time
+        from unittest.mock import AsyncMock, MagicMock, patch
+        from routes.chat import Album, PendingEnrichments, get_enrichment_cache_key, _enrich_memo
+
+        _enrich_memo.clear()
+        cached_key = f"enrich/{get_enrichment_cache_key('Base Set', 'Charizard', 'trading-cards')}.json"
+        cached_entry = MagicMock()
+        cached_entry.text = AsyncMock(return_value=json.dumps({
+            "album": {"artist": "Base Set", "album": "Charizard", "cover": "cached.jpg"},
+            "cached_at": int(time.time())
+        }))
+        mock_env.CACHE.get = AsyncMock(side_effect=lambda key: cached_entry if key == cached_key else None)
+        mock_env.CACHE.put = AsyncMock()
+
+        bulk = AsyncMock(return_value=[
+            Album(artist="Jungle", album="Pikachu", cover="p.jpg"),
+            Album(artist="Fossil", album="Gengar", cover="g.jpg"),
+        ])
+        albums = [
+            Album(artist="Base Set", album="Charizard"),
+            Album(artist="Jungle", album="Pikachu"),
+            Album(artist="Fossil", album="Gengar"),
+        ]
+        with patch.dict("routes.chat.BULK_CARD_LOOKUPS", {"pokemon": bulk}):
+            enrichments = PendingEnrichments("trading-cards", mock_env)
+            results = await asyncio.gather(*enrichments.schedule_all(albums))
+            await enrichments.save_cache_writes()
+
+        bulk.assert_awaited_once_with([("Jungle", "Pikachu"), ("Fossil", "Gengar")])
+        assert [r.cover for r in results] == ["cached.jpg", "p.jpg", "g.jpg"]
+        assert cached_key not in [call.args[0] for call in mock_env.CACHE.put.await_args_list]
+        assert mock_env.CACHE.put.await_count == 2
@@ -0,0 +1,92 @@
+"""
+Tests for collection routes against an in-memory SQLite stand-in for D1
+"""
+
+import pytest
+
+
+SCHEMA = """
+CREATE TABLE collections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+    artist TEXT NOT NULL, album TEXT NOT NULL, genre TEXT, cover TEXT, price REAL,
+    discogs_id INTEGER, year INTEGER, category_id INTEGER,
+    tags TEXT, condition TEXT, notes TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+@pytest.fixture
+def collection_db(sqlite_d1):
+    """One album owned by user 1"""
+    db = sqlite_d1(SCHEMA)
+    db.conn.execute(
+        """INSERT INTO collections (id, user_id, artist, album, genre, cover, year, tags, notes)
+           VALUES (1, 1, 'Miles Davis', 'Kind of Blue', 'Jazz', 'old.jpg', 1959, 'modal', 'mint')"""
+    )
+    return db
+
+
+@pytest.fixture
+def collection_request(mock_request, collection_db):
+    """Request whose env.DB is the SQLite-backed collection database"""
+    mock_request.scope["env"].DB = collection_db
+    return mock_request
+
+
+def stored_row(db, album_id=1):
+    return dict(db.conn.execute("SELECT * FROM collections WHERE id = ?", (album_id,)).fetchone())
+
+
+class TestUpdateAlbum:
+    """Tests for partial album updates"""
+
+    @pytest.mark.asyncio
+    async def test_partial_update_tags_only(self, collection_request, collection_db):
+        """Sending only tags updates tags and never binds None for the other columns"""
+        from routes.collection import update_album, AlbumUpdate
+
+        album = await update_album(collection_request, 1, AlbumUpdate(tags="favorite"), user_id=1)
+        row = stored_row(collection_db)
+
+        assert row["tags"] == "favorite"
+        assert row["artist"] == "Miles Davis"
+        assert row["cover"] == "old.jpg"
+        assert row["notes"] == "mint"
+        assert album.year == 1959
+
+    @pytest.mark.asyncio
+    async def test_partial_update_cover_year(self, collection_request, collection_db):
+        """Cover and year can be updated without touching the text fields"""
+        from routes.collection import update_album, AlbumUpdate
+
+        album = await update_album(
+            collection_request, 1, AlbumUpdate(cover="new.jpg", year=1960, discogs_id=42), user_id=1
+        )
+        row = stored_row(collection_db)
+
+        assert (row["cover"], row["year"], row["discogs_id"]) == ("new.jpg", 1960, 42)
+        assert row["tags"] == "modal"
+        assert album.cover == "new.jpg"
+
+    @pytest.mark.asyncio
+    async def test_clearing_notes_binds_empty_string(self, collection_request, collection_db):
+        """Explicitly sent null notes are stored as an empty string"""
+        from routes.collection import update_album, AlbumUpdate
+
+        await update_album(collection_request, 1, AlbumUpdate(notes=None), user_id=1)
+
+        assert stored_row(collection_db)["notes"] == ""
+
+    @pytest.mark.asyncio
+    async def test_other_users_album(self, collection_request, collection_db):
+        """Updating an album the user doesn't own returns 404 and changes nothing"""
+        from routes.collection import update_album, AlbumUpdate
+        from fastapi import HTTPException
+
+        with pytest.raises(HTTPException) as exc_info:
+            await update_album(collection_request, 1, AlbumUpdate(tags="x"), user_id=2)
+
+        assert exc_info.value.status_code == 404
+        assert stored_row(collection_db)["tags"] == "modal"
@@ -0,0 +1,175 @@
+"""
+Tests for forum comment routes against an in-memory SQLite stand-in for D1
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+
+
+SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, picture TEXT);
+CREATE TABLE forum_posts (
+    id INTEGER PRIMARY KEY, user_id INTEGER, title TEXT,
+    comment_count INTEGER DEFAULT 0, is_locked INTEGER DEFAULT 0
+);
+CREATE TABLE forum_comments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, post_id INTEGER NOT NULL, user_id INTEGER NOT NULL,
+    parent_comment_id INTEGER, body TEXT NOT NULL, images TEXT,
+    upvote_count INTEGER DEFAULT 0, downvote_count INTEGER DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE votes (user_id INTEGER, post_id INTEGER, comment_id INTEGER, value INTEGER);
+CREATE TABLE blocked_users (blocker_id INTEGER, blocked_id INTEGER);
+"""
+
+
+@pytest.fixture
+def forum_db(sqlite_d1):
+    """Post 1 with a three-level thread, a second root thread and an orphaned reply"""
+    db = sqlite_d1(SCHEMA)
+    db.conn.executescript("""
+        INSERT INTO users (id, name) VALUES (1, 'Ann'), (2, 'Bob'), (3, 'Cy'), (4, 'Dee');
+        INSERT INTO forum_posts (id, user_id, title, comment_count) VALUES (1, 2, 'Post', 6);
+        INSERT INTO forum_comments (id, post_id, user_id, parent_comment_id, body, created_at) VALUES
+            (1, 1, 1, NULL, 'root a', '2024-01-01 00:00:01'),
+            (2, 1, 2, 1, 'reply', '2024-01-01 00:00:02'),
+            (3, 1, 3, 2, 'deep', '2024-01-01 00:00:03'),
+            (4, 1, 4, NULL, 'root b', '2024-01-01 00:00:04'),
+            (5, 1, 2, 99, 'orphan', '2024-01-01 00:00:05'),
+            (6, 1, 3, 4, 'reply b', '2024-01-01 00:00:06');
+    """)
+    return db
+
+
+@pytest.fixture
+def forum_request(mock_request, forum_db):
+    """Request whose env.DB is the SQLite-backed forum database"""
+    mock_request.scope["env"].DB = forum_db
+    return mock_request
+
+
+def thread_shape(comments):
+    """(id, depth, nested replies) for each comment, recursively"""
+    return [(c["id"], c["depth"], thread_shape(c["replies"])) for c in comments]
+
+
+class TestGetComments:
+    """Tests for the recursive reply tree in get_comments"""
+
+    @pytest.mark.asyncio
+    async def test_nested_replies(self, forum_request):
+        """Replies nest under their parents with increasing depth, roots oldest first"""
+        from routes.comments import get_comments
+
+        response = await get_comments(forum_request, post_id=1, user_id=1)
+        data = json.loads(response.body)
+
+        assert data["total_count"] == 6
+        assert thread_shape(data["comments"]) == [
+            (1, 0, [(2, 1, [(3, 2, [])])]),
+            (4, 0, [(6, 1, [])]),
+            (5, 0, []),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_reply_to_deleted_parent_is_root(self, forum_request):
+        """A reply whose parent no longer exists is listed at depth 0"""
+        from routes.comments import get_comments
+
+        response = await get_comments(forum_request, post_id=1, user_id=1)
+        orphan = json.loads(response.body)["comments"][2]
+
+        assert orphan["id"] == 5
+        assert orphan["parent_comment_id"] == 99
+        assert orphan["depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_reply_to_blocked_parent_is_root(self, forum_request, forum_db):
+        """Blocked authors are hidden and their visible replies become roots"""
+        from routes.comments import get_comments
+
+        forum_db.conn.execute("INSERT INTO blocked_users (blocker_id, blocked_id) VALUES (1, 2)")
+
+        response = await get_comments(forum_request, post_id=1, user_id=1)
+        data = json.loads(response.body)
+
+        assert data["total_count"] == 4
+        assert thread_shape(data["comments"]) == [
+            (1, 0, []),
+            (3, 0, []),
+            (4, 0, [(6, 1, [])]),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_blocked_by_other_user(self, forum_request, forum_db):
+        """Comments from users who blocked the viewer are hidden too"""
+        from routes.comments import get_comments
+
+        forum_db.conn.execute("INSERT INTO blocked_users (blocker_id, blocked_id) VALUES (4, 1)")
+
+        response = await get_comments(forum_request, post_id=1, user_id=1)
+        data = json.loads(response.body)
+
+        assert thread_shape(data["comments"]) == [
+            (1, 0, [(2, 1, [(3, 2, [])])]),
+            (5, 0, []),
+            (6, 0, []),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_missing_post(self, forum_request):
+        """Unknown posts return 404"""
+        from routes.comments import get_comments
+        from fastapi import HTTPException
+
+        with pytest.raises(HTTPException) as exc_info:
+            await get_comments(forum_request, post_id=9, user_id=1)
+
+        assert exc_info.value.status_code == 404
+
+
+class TestDeleteComment:
+    """Tests for deleting a comment with its replies"""
+
+    @pytest.mark.asyncio
+    async def test_deletes_descendants_and_decrements_count(self, forum_request, forum_db):
+        """The comment, every nested reply and the matching comment_count are removed"""
+        from routes.comments import delete_comment
+
+        with patch("routes.comments.to_js", side_effect=lambda value: value):
+            result = await delete_comment(forum_request, comment_id=1, user_id=1)
+
+        remaining = [row[0] for row in forum_db.conn.execute("SELECT id FROM forum_comments ORDER BY id")]
+        count = forum_db.conn.execute("SELECT comment_count FROM forum_posts WHERE id = 1").fetchone()[0]
+
+        assert result["deleted_count"] == 3
+        assert remaining == [4, 5, 6]
+        assert count == 3
+
+    @pytest.mark.asyncio
+    async def test_not_owner(self, forum_request, forum_db):
+        """Deleting someone else's comment is refused and changes nothing"""
+        from routes.comments import delete_comment
+        from fastapi import HTTPException
+
+        with patch("routes.comments.to_js", side_effect=lambda value: value):
+            with pytest.raises(HTTPException) as exc_info:
+                await delete_comment(forum_request, comment_id=4, user_id=1)
+
+        count = forum_db.conn.execute("SELECT comment_count FROM forum_posts WHERE id = 1").fetchone()[0]
+
+        assert exc_info.value.status_code == 403
+        assert count == 6
+
+    @pytest.mark.asyncio
+    async def test_missing_comment(self, forum_request):
+        """Unknown comments return 404"""
+        from routes.comments import delete_comment
+        from fastapi import HTTPException
+
+        with patch("routes.comments.to_js", side_effect=lambda value: value):
+            with pytest.raises(HTTPException) as exc_info:
+                await delete_comment(forum_request, comment_id=99, user_id=1)
+
+        assert exc_info.value.status_code == 404